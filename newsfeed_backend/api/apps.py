@@ -4,3 +4,26 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from django.core.checks import Tags, register
+        from django.db.models.signals import post_delete, post_save
+        from .auth import invalidate_user_tokens
+        from .checks import check_http_cache, check_response_cache
+        from .models import Comment, Post
+        from .search import comment_deleted, comment_saved, post_deleted, post_saved
+
+        # Drop cached JWT authentications whenever the user they point at changes
+        post_save.connect(invalidate_user_tokens, sender=User, dispatch_uid='api_invalidate_user_tokens_save')
+        post_delete.connect(invalidate_user_tokens, sender=User, dispatch_uid='api_invalidate_user_tokens_delete')
+
+        # Keep the full-text search index in step with posts and comments
+        post_save.connect(post_saved, sender=Post, dispatch_uid='api_search_post_save')
+        post_delete.connect(post_deleted, sender=Post, dispatch_uid='api_search_post_delete')
+        post_save.connect(comment_saved, sender=Comment, dispatch_uid='api_search_comment_save')
+        post_delete.connect(comment_deleted, sender=Comment, dispatch_uid='api_search_comment_delete')
+
+        # A local-memory cache is fine for one process but not for a deployment
+        register(check_response_cache, Tags.caches, deploy=True)
+        register(check_http_cache, Tags.caches, deploy=True)
@@ -0,0 +1,112 @@
+from functools import wraps
+
+from ariadne import MutationType, ObjectType, QueryType, make_executable_schema
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+
+from .feed import home_feed
+from .models import Comment, Post
+from .pagination import DEFAULT_ORDERING, apaginate
+from .projection import COMMENT_FIELDS, POST_FIELDS, project
+from .schema import (
+    comment_type,
+    datetime_scalar,
+    get_loaders,
+    get_user_from_context,
+    like_type,
+    mutation,
+    post_type,
+    query,
+    resolve_me,
+    type_defs,
+    user_type,
+)
+from .subscriptions import subscription
+
+# The async schema shares type_defs and every resolver that doesn't touch the
+# database with api/schema.py. Nested fields that do (likes, comments,
+# isLiked, authors) go through the per-request loaders, which return
+# awaitables when the view creates them with AsyncDataLoader. Root query
+# fields get native async ORM resolvers below; anything else is run in a
+# worker thread with sync_to_async.
+
+
+def run_in_thread(resolver):
+    @wraps(resolver)
+    async def wrapper(*args, **kwargs):
+        def run():
+            result = resolver(*args, **kwargs)
+            # Querysets are lazy; evaluate them while we are still in the thread
+            if isinstance(result, QuerySet):
+                result = list(result)
+            return result
+        return await sync_to_async(run)()
+    return wrapper
+
+
+def async_bindable(bindable, sync_bindable, overrides):
+    # Copy every resolver from the sync bindable, preferring native async overrides
+    for field, resolver in sync_bindable._resolvers.items():
+        bindable.set_field(field, overrides.get(field) or run_in_thread(resolver))
+    return bindable
+
+
+async def resolve_all_posts(_, info):
+    posts = [post async for post in project(Post.objects.all(), info, POST_FIELDS)]
+    # Let the nested Post fields load in one batch for the whole list
+    return get_loaders(info).expect_posts(posts)
+
+
+async def resolve_posts_connection(_, info, first=None, after=None):
+    posts = project(Post.objects.all(), info, POST_FIELDS, path=('edges', 'node'), keys=DEFAULT_ORDERING)
+    connection = await apaginate(posts, first=first, after=after)
+    get_loaders(info).expect_posts([edge['node'] for edge in connection['edges']])
+    return connection
+
+
+async def resolve_home_feed(_, info, first=None, after=None):
+    user = get_user_from_context(info.context)
+    if not user:
+        return None
+    # Several dependent queries; one thread hop for all of them
+    connection = await sync_to_async(home_feed)(user, first=first, after=after)
+    get_loaders(info).expect_posts([edge['node'] for edge in connection['edges']])
+    return connection
+
+
+async def resolve_post(_, info, id):
+    return await project(Post.objects.filter(pk=id), info, POST_FIELDS).afirst()
+
+
+async def resolve_post_comments(_, info, postId):
+    queryset = project(Comment.objects.filter(post_id=postId), info, COMMENT_FIELDS).order_by('-created_at')
+    return [comment async for comment in queryset]
+
+
+async def resolve_post_comments_connection(obj, info, first=None, after=None):
+    comments = project(obj.comments.all(), info, COMMENT_FIELDS, path=('edges', 'node'), keys=DEFAULT_ORDERING)
+    return await apaginate(comments, first=first, after=after)
+
+
+async_query = async_bindable(QueryType(), query, {
+    'allPosts': resolve_all_posts,
+    'postsConnection': resolve_posts_connection,
+    'homeFeed': resolve_home_feed,
+    'post': resolve_post,
+    'postComments': resolve_post_comments,
+    'me': resolve_me,
+})
+
+# Mutations write inside transaction.atomic(), which is sync-only
+async_mutation = async_bindable(MutationType(), mutation, {})
+
+# Nested Post fields are already loader-backed; only commentsConnection queries directly
+async_post_type = ObjectType("Post")
+for field, resolver in post_type._resolvers.items():
+    async_post_type.set_field(field, resolver)
+async_post_type.set_field("commentsConnection", resolve_post_comments_connection)
+
+async_schema = make_executable_schema(
+    type_defs, async_query, async_mutation, subscription, async_post_type, user_type, comment_type, like_type,
+    datetime_scalar,
+)
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import User
+
+# Defaults for settings.JWT_AUTH_CACHE
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 300
+
+# The subset of User columns the resolvers actually read, in model field order
+# (Model.from_db expects that). Anything else is deferred and loaded from the
+# database on first access, like .only() would.
+SNAPSHOT_FIELDS = (
+    'id', 'is_superuser', 'username', 'first_name', 'last_name', 'email', 'is_staff', 'is_active',
+)
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified JWTs.
+
+    Each entry holds the decoded claims and a snapshot of the user row and
+    expires at whichever comes first: the token's own `exp` or `ttl` seconds
+    after it was cached. Entries are also indexed by user id so that saving
+    or deleting a user can evict every token that belongs to them.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry['expires_at'] <= time.time():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return entry
+
+    def set(self, token, claims, user_values):
+        expires_at = time.time() + self.ttl
+        if claims.get('exp'):
+            expires_at = min(expires_at, claims['exp'])
+
+        user_id = user_values[0]
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = {
+                'claims': claims,
+                'user_values': user_values,
+                'expires_at': expires_at,
+            }
+            self._tokens_by_user.setdefault(user_id, set()).add(token)
+
+            # Evict least recently used tokens once we are over the bound
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry['user_values'][0]
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+def _build_cache():
+    options = getattr(settings, 'JWT_AUTH_CACHE', {})
+    return TokenCache(
+        max_entries=options.get('MAX_ENTRIES', DEFAULT_MAX_ENTRIES),
+        ttl=options.get('TTL', DEFAULT_TTL),
+    )
+
+
+token_cache = _build_cache()
+
+
+def user_from_snapshot(user_values):
+    # A fresh instance per request, so nothing a resolver does to it leaks into the cache
+    return User.from_db('default', SNAPSHOT_FIELDS, user_values)
+
+
+def get_user_from_token(token):
+    """
+    Return the User a JWT belongs to, or None if the token is invalid,
+    expired or its user no longer exists.
+
+    Cache hits skip both the signature check and the user lookup.
+    """
+    entry = token_cache.get(token)
+    if entry is not None:
+        return user_from_snapshot(entry['user_values'])
+
+    try:
+        # Decode and verify the token
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+    except jwt.PyJWTError:
+        return None
+
+    user_id = claims.get('user_id')
+    if not user_id:
+        return None
+
+    user_values = User.objects.filter(id=user_id).values_list(*SNAPSHOT_FIELDS).first()
+    if user_values is None:
+        return None
+
+    token_cache.set(token, claims, user_values)
+    return user_from_snapshot(user_values)
+
+
+def invalidate_user_tokens(sender, instance, **kwargs):
+    # Connected to User post_save/post_delete in ApiConfig.ready()
+    token_cache.invalidate_user(instance.pk)
@@ -0,0 +1,246 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from .models import Post
+from .schema import generate_token, schema
+from .views import CustomGraphQLView
+
+# The operations the frontend sends on its hot paths, copied from the components
+GET_ALL_POSTS = """
+  query GetAllPosts {
+    allPosts {
+      id
+      title
+      contentPreview
+      contentTruncated
+      author {
+        id
+        username
+      }
+      createdAt
+      updatedAt
+      isAuthor
+      likesCount
+      commentsCount
+      isLiked
+      __typename
+    }
+  }
+"""
+
+GET_POST_COMMENTS = """
+  query GetPostComments($postId: ID!) {
+    postComments(postId: $postId) {
+      id
+      content
+      author {
+        id
+        username
+      }
+      createdAt
+      updatedAt
+      isAuthor
+    }
+  }
+"""
+
+LIKE_POST = """
+  mutation LikePost($postId: ID!) {
+    likePost(postId: $postId) {
+      id
+      likesCount
+      isLiked
+    }
+  }
+"""
+
+CREATE_COMMENT = """
+  mutation CreateComment($input: CreateCommentInput!) {
+    createComment(input: $input) {
+      id
+      content
+      createdAt
+      author {
+        id
+        username
+      }
+    }
+  }
+"""
+
+LOGIN = """
+  mutation Login($input: LoginInput!) {
+    login(input: $input) {
+      token
+      user {
+        id
+        username
+        firstName
+        lastName
+        email
+      }
+    }
+  }
+"""
+
+# What seed_data gives every user it creates; Login signs in with it
+BENCHMARK_PASSWORD = 'password'
+
+
+class Operation:
+    def __init__(self, name, query, variables=lambda state, i: {}, authenticated=True, max_iterations=None):
+        self.name = name
+        self.query = query
+        # Called with (BenchmarkState, iteration) so each run can target a different row
+        self.variables = variables
+        self.authenticated = authenticated
+        # Caps operations that are slow by design (password hashing)
+        self.max_iterations = max_iterations
+
+
+OPERATIONS = [
+    Operation('GetAllPosts', GET_ALL_POSTS),
+    Operation('GetPostComments', GET_POST_COMMENTS, lambda state, i: {'postId': state.busiest_post_id}),
+    # A different, not yet liked post every time so each run does the same work
+    Operation('LikePost', LIKE_POST, lambda state, i: {'postId': state.unliked_post_id(i)}),
+    Operation(
+        'CreateComment', CREATE_COMMENT,
+        lambda state, i: {'input': {'postId': state.busiest_post_id, 'content': f'Benchmark comment {i}'}},
+    ),
+    Operation(
+        'Login', LOGIN,
+        lambda state, i: {'input': {'username': state.user.username, 'password': BENCHMARK_PASSWORD}},
+        authenticated=False, max_iterations=5,
+    ),
+]
+
+
+class BenchmarkState:
+    """The viewer and rows the operations run against."""
+
+    def __init__(self, user, busiest_post_id, unliked_post_ids):
+        self.user = user
+        self.token = generate_token(user)
+        self.busiest_post_id = busiest_post_id
+        self.unliked_post_ids = unliked_post_ids
+
+    def unliked_post_id(self, i):
+        return self.unliked_post_ids[i % len(self.unliked_post_ids)]
+
+    @classmethod
+    def from_database(cls, iterations):
+        # The user with the most likes sees the most isLiked=true, the worst case for the feed
+        user = (
+            User.objects.filter(is_superuser=False).annotate(like_total=Count('likes')).order_by('-like_total', 'id').first()
+            or User.objects.first()
+        )
+        if user is None or not Post.objects.exists():
+            raise ValueError('The database has no users or posts to benchmark against')
+        busiest = Post.objects.order_by('-comments_count', 'id').values_list('id', flat=True).first()
+        unliked = list(Post.objects.exclude(likes__user=user).order_by('id').values_list('id', flat=True)[:iterations])
+        return cls(user, busiest, unliked or [busiest])
+
+
+class OperationResult:
+    def __init__(self, name, latencies, queries, peak_memory):
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.queries = queries
+        self.peak_memory = peak_memory
+
+    @property
+    def p50(self):
+        return statistics.median(self.latencies)
+
+    @property
+    def p95(self):
+        return self.latencies[min(len(self.latencies) - 1, int(len(self.latencies) * 0.95))]
+
+    def as_dict(self):
+        return {
+            'p50_ms': round(self.p50 * 1000, 2),
+            'p95_ms': round(self.p95 * 1000, 2),
+            'queries': self.queries,
+            'peak_memory_kb': round(self.peak_memory / 1024, 1),
+        }
+
+
+def execute(view, state, operation, i):
+    body = json.dumps({'query': operation.query, 'variables': operation.variables(state, i)})
+    headers = {'HTTP_AUTHORIZATION': f'JWT {state.token}'} if operation.authenticated else {}
+    request = RequestFactory().post('/graphql/', body, content_type='application/json', **headers)
+    response = view(request)
+    result = json.loads(response.content)
+    if response.status_code != 200 or result.get('errors'):
+        raise RuntimeError(f'{operation.name} failed: {result}')
+    return result
+
+
+def run_operation(state, operation, iterations, warmup=2):
+    """Time `operation` through CustomGraphQLView, the same path as the real endpoint."""
+    view = CustomGraphQLView.as_view(schema=schema)
+    if operation.max_iterations:
+        iterations = min(iterations, operation.max_iterations)
+        warmup = min(warmup, 1)
+
+    step = 0
+    for _ in range(warmup):
+        execute(view, state, operation, step)
+        step += 1
+
+    latencies = []
+    queries = 0
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            execute(view, state, operation, step)
+            latencies.append(time.perf_counter() - start)
+        queries = max(queries, len(captured))
+        step += 1
+
+    # Memory is measured on a separate run; tracemalloc slows everything down
+    tracemalloc.start()
+    try:
+        execute(view, state, operation, step)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return OperationResult(operation.name, latencies, queries, peak_memory)
+
+
+def run_benchmarks(iterations, operations=OPERATIONS):
+    state = BenchmarkState.from_database(iterations + 3)
+    return [run_operation(state, operation, iterations) for operation in operations]
+
+
+def compare(results, baseline, latency_tolerance=0.5, memory_tolerance=0.25):
+    """
+    Return a list of regressions against `baseline` ({name: as_dict()}).
+
+    Query counts must not grow at all. Latency and memory may grow by the
+    given fraction, since they depend on the machine.
+    """
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.name)
+        if expected is None:
+            continue
+        actual = result.as_dict()
+        if actual['queries'] > expected['queries']:
+            regressions.append(f"{result.name}: {actual['queries']} queries (baseline {expected['queries']})")
+        if actual['p95_ms'] > expected['p95_ms'] * (1 + latency_tolerance):
+            regressions.append(f"{result.name}: p95 {actual['p95_ms']}ms (baseline {expected['p95_ms']}ms)")
+        if actual['peak_memory_kb'] > expected['peak_memory_kb'] * (1 + memory_tolerance):
+            regressions.append(
+                f"{result.name}: peak memory {actual['peak_memory_kb']}KB (baseline {expected['peak_memory_kb']}KB)"
+            )
+    return regressions
@@ -0,0 +1,34 @@
+from django.core.checks import Warning
+
+from . import http_cache, response_cache
+
+
+def check_response_cache(app_configs, **kwargs):
+    """The response cache needs a cache every worker shares for its invalidations to reach them all."""
+    if not response_cache.is_enabled() or response_cache.is_shared_cache():
+        return []
+    alias = response_cache.cache_options().get('CACHE_ALIAS', response_cache.DEFAULT_CACHE_ALIAS)
+    return [
+        Warning(
+            f"GRAPHQL_RESPONSE_CACHE uses the local-memory cache '{alias}'. With several worker processes, "
+            "a mutation only invalidates the results cached by its own worker; the others serve stale "
+            "results until they expire.",
+            hint=f"Point CACHES['{alias}'] at Redis, Memcached or the database cache, "
+                 "or set GRAPHQL_RESPONSE_CACHE['ENABLED'] to False.",
+            id='api.W001',
+        )
+    ]
+
+
+def check_http_cache(app_configs, **kwargs):
+    """ETags are built from tag versions, which every worker must see bumped."""
+    if not http_cache.http_cache_options().get('ENABLED', True) or response_cache.is_shared_cache():
+        return []
+    return [
+        Warning(
+            "GRAPHQL_HTTP_CACHE is enabled, but the tag versions are in a local-memory cache, "
+            "so GET queries get no ETags.",
+            hint="Point the response cache's CACHE_ALIAS at Redis, Memcached or the database cache.",
+            id='api.W002',
+        )
+    ]
@@ -0,0 +1,173 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import GraphQLError, parse, print_ast, validate
+
+# Defaults for settings.GRAPHQL_DOCUMENTS
+DEFAULT_MAX_DOCUMENTS = 1000
+DEFAULT_CACHE_ALIAS = 'default'
+# Registered query texts expire after this many idle seconds, and longer texts
+# are refused, so clients can't grow the shared store without bound
+DEFAULT_PERSISTED_QUERY_TTL = 24 * 60 * 60
+DEFAULT_MAX_PERSISTED_QUERY_SIZE = 16 * 1024
+
+APQ_KEY_PREFIX = 'graphql-apq'
+
+
+def document_options():
+    return getattr(settings, 'GRAPHQL_DOCUMENTS', {})
+
+
+def sha256(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueryError(Exception):
+    """Automatic persisted query failures, reported the way Apollo clients expect."""
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+    def formatted(self):
+        return {'message': self.message, 'extensions': {'code': self.code}}
+
+
+def resolve_persisted_query(data):
+    """
+    Apply Automatic Persisted Queries to the request data.
+
+    A request carrying only `extensions.persistedQuery.sha256Hash` has its
+    query text looked up in the shared cache. A request carrying both the
+    hash and the text registers the text under the hash (after checking they
+    match), so the client can send just the hash from then on.
+    """
+    extensions = data.get('extensions') or {}
+    persisted = extensions.get('persistedQuery') if isinstance(extensions, dict) else None
+    if not isinstance(persisted, dict):
+        return
+
+    if persisted.get('version') != 1:
+        raise PersistedQueryError('Unsupported persisted query version', 'PERSISTED_QUERY_NOT_SUPPORTED')
+    query_hash = persisted.get('sha256Hash')
+    if not isinstance(query_hash, str):
+        raise PersistedQueryError('Missing persisted query hash', 'BAD_USER_INPUT')
+
+    options = document_options()
+    cache = caches[options.get('CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+    ttl = options.get('PERSISTED_QUERY_TTL', DEFAULT_PERSISTED_QUERY_TTL)
+    key = f'{APQ_KEY_PREFIX}:{query_hash}'
+    query = data.get('query')
+
+    if not query:
+        query = cache.get(key)
+        if query is None:
+            # The client retries with the full text, which registers it
+            raise PersistedQueryError('PersistedQueryNotFound', 'PERSISTED_QUERY_NOT_FOUND')
+        # Queries in use never expire; abandoned ones age out
+        cache.touch(key, ttl)
+        data['query'] = query
+        return
+
+    max_size = options.get('MAX_PERSISTED_QUERY_SIZE', DEFAULT_MAX_PERSISTED_QUERY_SIZE)
+    if not isinstance(query, str) or len(query.encode()) > max_size:
+        raise PersistedQueryError(
+            f'Persisted queries are limited to {max_size} bytes', 'PERSISTED_QUERY_TOO_LARGE'
+        )
+    if sha256(query) != query_hash:
+        raise PersistedQueryError('provided sha does not match query', 'BAD_USER_INPUT')
+    cache.set(key, query, timeout=ttl)
+
+
+class ParsedQuery:
+    """A parsed document plus everything derived from it that is worth keeping."""
+
+    def __init__(self, document):
+        self.document = document
+        self._normalized = None
+        # Validation errors per rule set, see DocumentCache.validate
+        self.validation = {}
+
+    @property
+    def normalized(self):
+        # Whitespace/comment-insensitive text, used in cache keys
+        if self._normalized is None:
+            self._normalized = print_ast(self.document)
+        return self._normalized
+
+
+class DocumentCache:
+    """
+    Process-wide LRU of parsed and validated documents, keyed by query text.
+
+    Clients send the same handful of operations over and over, so after the
+    first request each operation skips both parse() and validate().
+    """
+
+    def __init__(self, max_documents=DEFAULT_MAX_DOCUMENTS):
+        self.max_documents = max_documents
+        self._entries = OrderedDict()
+        # id(document) -> ParsedQuery, for documents currently in the cache
+        self._by_document = {}
+        self._lock = threading.Lock()
+
+    def parse(self, query):
+        """Return the ParsedQuery for `query`, raising GraphQLError on syntax errors."""
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is not None:
+                self._entries.move_to_end(query)
+                return entry
+
+        entry = ParsedQuery(parse(query))
+
+        with self._lock:
+            self._entries[query] = entry
+            self._by_document[id(entry.document)] = entry
+            while len(self._entries) > self.max_documents:
+                _, evicted = self._entries.popitem(last=False)
+                self._by_document.pop(id(evicted.document), None)
+        return entry
+
+    def validate(self, schema, document_ast, rules=None, max_errors=None, type_info=None):
+        # Same signature as graphql.validate so it can be passed as ariadne's query_validator
+        entry = self._by_document.get(id(document_ast))
+        if entry is None or entry.document is not document_ast or type_info is not None:
+            return validate(schema, document_ast, rules=rules, max_errors=max_errors, type_info=type_info)
+
+        key = (id(schema), tuple(rules) if rules is not None else None, max_errors)
+        errors = entry.validation.get(key)
+        if errors is None:
+            errors = validate(schema, document_ast, rules=rules, max_errors=max_errors)
+            entry.validation[key] = errors
+        return errors
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_document.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+document_cache = DocumentCache(document_options().get('MAX_DOCUMENTS', DEFAULT_MAX_DOCUMENTS))
+
+
+def parse_request(data):
+    """
+    Resolve persisted queries and return the ParsedQuery for a request, or
+    None when there is nothing parseable (graphql_sync reports the error).
+    """
+    resolve_persisted_query(data)
+    query = data.get('query')
+    if not isinstance(query, str):
+        return None
+    try:
+        return document_cache.parse(query)
+    except GraphQLError:
+        return None
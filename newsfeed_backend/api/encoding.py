@@ -0,0 +1,60 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:  # optional, `pip install orjson`
+    orjson = None
+
+# Defaults for settings.GRAPHQL_RESPONSE_ENCODING
+DEFAULT_ENCODER = 'auto'
+
+# With DateTime serialized by its scalar, a result is plain dicts, lists,
+# strings and numbers; the Django encoder's fallbacks are only there for
+# anything a resolver leaves raw. The stdlib encoder keeps ensure_ascii, its
+# fastest path in C.
+_django_default = DjangoJSONEncoder().default
+
+
+def encode_json(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def encode_orjson(data):
+    return orjson.dumps(data, default=_django_default)
+
+
+ENCODERS = {
+    'json': encode_json,
+    'orjson': encode_orjson,
+}
+
+
+def encoding_options():
+    return getattr(settings, 'GRAPHQL_RESPONSE_ENCODING', {})
+
+
+def get_encoder():
+    """The configured callable turning a response dict into JSON bytes."""
+    name = encoding_options().get('ENCODER', DEFAULT_ENCODER)
+    if name == 'auto':
+        return encode_orjson if orjson is not None else encode_json
+    if name == 'orjson' and orjson is None:
+        raise ImportError("GRAPHQL_RESPONSE_ENCODING['ENCODER'] is 'orjson' but orjson is not installed")
+    return ENCODERS.get(name) or import_string(name)
+
+
+def encode(data):
+    return get_encoder()(data)
+
+
+class GraphQLResponse(HttpResponse):
+    """JsonResponse, encoded with the configured encoder."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(encode(data), **kwargs)
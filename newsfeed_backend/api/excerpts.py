@@ -0,0 +1,55 @@
+import re
+
+# Feed cards show a stored plain-text excerpt of each post instead of its full
+# content, so a page of posts is a bounded number of bytes however long the
+# posts are. Post.save() keeps it in step with the content; run
+# `manage.py backfill_excerpts` after writing content without it (update(),
+# raw SQL) or after changing EXCERPT_LENGTH.
+EXCERPT_LENGTH = 280
+ELLIPSIS = '…'
+
+# Markdown heading markers at the start of a line, e.g. "## Title"
+HEADING_MARKER = re.compile(r'^\s*#+\s*', re.MULTILINE)
+
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    """
+    (excerpt, truncated): `content` on one line, cut at a word boundary to at
+    most `length` characters including the trailing ellipsis.
+    """
+    text = ' '.join(HEADING_MARKER.sub('', content).split())
+    if len(text) <= length:
+        return text, False
+    # One character past the limit, to tell whether the last word is whole
+    cut = text[:length - len(ELLIPSIS) + 1]
+    # Drop the partial last word, unless the text is one very long word
+    if ' ' in cut:
+        cut = cut[:cut.rindex(' ')]
+    else:
+        cut = cut[:-1]
+    return cut.rstrip(' .,;:-') + ELLIPSIS, True
+
+
+def backfill_excerpts(posts, batch_size=1000):
+    """
+    Recompute the stored excerpt of every post in the `posts` queryset (which
+    may be of a migration's historical model). Returns how many changed.
+    """
+    changed = 0
+    last_id = 0
+    # Walk the table in primary key order, reading only what the excerpt needs
+    while True:
+        fields = ('id', 'content', 'excerpt', 'excerpt_truncated')
+        batch = list(posts.filter(id__gt=last_id).order_by('id').only(*fields)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        stale = []
+        for post in batch:
+            excerpt = make_excerpt(post.content)
+            if (post.excerpt, post.excerpt_truncated) != excerpt:
+                post.excerpt, post.excerpt_truncated = excerpt
+                stale.append(post)
+        posts.bulk_update(stale, ['excerpt', 'excerpt_truncated'])
+        changed += len(stale)
+    return changed
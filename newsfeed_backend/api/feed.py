@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import Post, Follow, TimelineEntry
+from .pagination import DEFAULT_ORDERING, build_connection, decode_cursor, keyset_filter, page_size
+
+# Defaults for settings.HOME_FEED
+DEFAULT_FANOUT_MAX_FOLLOWERS = 10000
+DEFAULT_FOLLOW_BACKFILL = 50
+DEFAULT_FANOUT_BATCH_SIZE = 1000
+
+
+def feed_setting(name, default):
+    return getattr(settings, 'HOME_FEED', {}).get(name, default)
+
+
+def is_high_follower(user_id):
+    # Authors at or above the threshold are merged on read instead of fanned out on write
+    threshold = feed_setting('FANOUT_MAX_FOLLOWERS', DEFAULT_FANOUT_MAX_FOLLOWERS)
+    return Follow.objects.filter(followee_id=user_id).count() >= threshold
+
+
+def fan_out_post(post):
+    """
+    Write a new post into its author's timeline and, unless the author has
+    too many followers, into every follower's timeline.
+    """
+    batch_size = feed_setting('FANOUT_BATCH_SIZE', DEFAULT_FANOUT_BATCH_SIZE)
+    user_ids = [post.author_id]
+    if not is_high_follower(post.author_id):
+        user_ids += Follow.objects.filter(followee_id=post.author_id).values_list('follower_id', flat=True)
+
+    entries = (TimelineEntry(user_id=user_id, post=post, created_at=post.created_at) for user_id in user_ids)
+    TimelineEntry.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
+
+
+def follow(follower, followee):
+    """Create the follow edge and backfill the followee's recent posts. Returns False if it already existed."""
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(follower=follower, followee=followee)
+        if not created:
+            return False
+
+        if is_high_follower(followee.id):
+            # Switch every follower of this account (including the new one) to read-time merging
+            Follow.objects.filter(followee=followee, fanout_on_read=False).update(fanout_on_read=True)
+            return True
+
+    # Normal accounts: copy their most recent posts into the new follower's timeline
+    limit = feed_setting('FOLLOW_BACKFILL', DEFAULT_FOLLOW_BACKFILL)
+    recent = Post.objects.filter(author=followee).order_by('-created_at', '-id').values_list('id', 'created_at')[:limit]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user=follower, post_id=post_id, created_at=created_at) for post_id, created_at in recent],
+        ignore_conflicts=True,
+    )
+    return True
+
+
+def unfollow(follower, followee):
+    """Remove the follow edge and the followee's posts from the follower's timeline."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(follower=follower, followee=followee).delete()
+        if deleted:
+            TimelineEntry.objects.filter(user=follower, post__author=followee).delete()
+    return bool(deleted)
+
+
+def home_feed(user, first=None, after=None):
+    """
+    One page of a user's home feed, newest first.
+
+    The materialized timeline is a single range scan on
+    (user, created_at, post). Posts by high-follower accounts are never
+    fanned out, so a second range scan over their posts is merged in.
+    Both use the same (created_at, id) cursor as postsConnection.
+    """
+    limit = page_size(first)
+    cursor = decode_cursor(after, Post, DEFAULT_ORDERING) if after else None
+
+    entries = TimelineEntry.objects.filter(user=user).select_related('post__author')
+    if cursor:
+        entries = entries.filter(keyset_filter(('created_at', 'post_id'), cursor))
+    posts = [entry.post for entry in entries.order_by('-created_at', '-post_id')[:limit + 1]]
+
+    merged_author_ids = list(
+        Follow.objects.filter(follower=user, fanout_on_read=True).values_list('followee_id', flat=True)
+    )
+    if merged_author_ids:
+        merged = Post.objects.filter(author_id__in=merged_author_ids).select_related('author')
+        if cursor:
+            merged = merged.filter(keyset_filter(DEFAULT_ORDERING, cursor))
+        posts += list(merged.order_by('-created_at', '-id')[:limit + 1])
+
+        # An author can cross the threshold after some posts were already fanned out
+        unique = {post.id: post for post in posts}
+        posts = sorted(unique.values(), key=lambda post: (post.created_at, post.id), reverse=True)
+
+    return build_connection(posts, limit, after, lambda post: [post.created_at, post.id])
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+from graphql import OperationType
+from graphql.utilities import get_operation_ast
+
+from .response_cache import get_tag_versions, is_shared_cache, operation_tags
+
+# Defaults for settings.GRAPHQL_HTTP_CACHE
+DEFAULT_MAX_AGE = 0
+DEFAULT_TIME_BUCKET = 60
+
+# Root fields whose results also change with the clock, with no mutation to
+# bump a tag: topPosts drops posts as they age out of its window. Their ETags
+# change every TIME_BUCKET seconds as well.
+CLOCK_ROOT_FIELDS = {'topPosts'}
+
+# HTTP caching of queries sent with GET. A query whose root fields all have
+# invalidation tags in response_cache.CACHEABLE_ROOT_FIELDS gets a strong ETag
+# made from the tags' current versions, which every post/like/comment mutation
+# bumps. A request whose If-None-Match still matches is answered with a 304
+# before anything executes, so polling clients and caching proxies only pay
+# for a cache read while the data is unchanged. The tag versions must live in
+# a cache every worker shares: on a per-process local-memory cache, workers
+# that didn't run a mutation would keep answering 304 indefinitely, so ETags
+# are left off there.
+
+
+def http_cache_options():
+    return getattr(settings, 'GRAPHQL_HTTP_CACHE', {})
+
+
+def is_enabled():
+    return http_cache_options().get('ENABLED', True) and is_shared_cache()
+
+
+class Validator:
+    """The ETag of one GET query, and the tag versions it was made from."""
+
+    def __init__(self, tags, versions, etag, max_age):
+        self.tags = tags
+        self.versions = versions
+        self.etag = etag
+        self.max_age = max_age
+
+    def still_current(self):
+        # False if a mutation bumped a tag while the query executed, in which
+        # case the result may be newer than the ETag says
+        return get_tag_versions(self.tags) == self.versions
+
+
+def max_age_for(operation):
+    # The smallest max-age of the operation's root fields
+    options = http_cache_options()
+    field_max_age = options.get('FIELD_MAX_AGE', {})
+    default = options.get('MAX_AGE', DEFAULT_MAX_AGE)
+    return min(field_max_age.get(selection.name.value, default) for selection in operation.selection_set.selections)
+
+
+def time_bucket(operation):
+    # None unless the operation selects a CLOCK_ROOT_FIELDS field
+    if not any(selection.name.value in CLOCK_ROOT_FIELDS for selection in operation.selection_set.selections):
+        return None
+    return int(time.time() // http_cache_options().get('TIME_BUCKET', DEFAULT_TIME_BUCKET))
+
+
+def validator_for(schema, document, data, user, normalized_query):
+    """A Validator if this query's result can be revalidated by ETag, else None."""
+    if not is_enabled():
+        return None
+    operation = get_operation_ast(document, data.get('operationName'))
+    if operation is None or operation.operation != OperationType.QUERY:
+        return None
+    variables = data.get('variables') or {}
+    tags = operation_tags(schema, operation, variables)
+    if tags is None:
+        return None
+
+    versions = get_tag_versions(tags)
+    # Viewer fields (isLiked, isAuthor, email) make the result per user
+    raw = json.dumps(
+        [
+            normalized_query, data.get('operationName'), variables, user.id if user is not None else None, versions,
+            time_bucket(operation),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    etag = f'"{hashlib.sha256(raw.encode()).hexdigest()}"'
+    return Validator(tags, versions, etag, max_age_for(operation))
+
+
+def if_none_match(request, etag):
+    """Whether the request's If-None-Match matches `etag` (weak comparison, as RFC 9110 specifies for it)."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in [value.removeprefix('W/') for value in etags]
+
+
+def cache_headers(validator, authenticated):
+    """ETag, Cache-Control and Vary for a successful GET query."""
+    # Results differ by viewer, who is identified by the JWT or the session
+    headers = {'Vary': 'Authorization, Cookie'}
+    if validator is None:
+        # Nothing to revalidate against, e.g. `me`, homeFeed or a result with errors
+        headers['Cache-Control'] = 'no-store'
+        return headers
+    scope = 'private' if authenticated else 'public'
+    headers['ETag'] = validator.etag
+    headers['Cache-Control'] = f'{scope}, max-age={validator.max_age}'
+    return headers
+
+
+def not_modified(validator, authenticated):
+    response = HttpResponseNotModified()
+    for header, value in cache_headers(validator, authenticated).items():
+        response[header] = value
+    return response
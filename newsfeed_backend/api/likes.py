@@ -0,0 +1,84 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+
+from .models import Like, Post
+from .ranking import hot_score_update
+
+# Most (postId, liked) pairs one setLikes call may carry
+MAX_SET_LIKES = 100
+
+
+def insert_like(cursor, connection, user, post_id):
+    """
+    Insert the like unless it exists, in one statement. Selecting from the
+    post table skips missing posts, and ON CONFLICT makes concurrent likes of
+    the same post by the same user a no-op instead of an IntegrityError.
+    Returns whether a row was inserted.
+    """
+    like_table = connection.ops.quote_name(Like._meta.db_table)
+    post_table = connection.ops.quote_name(Post._meta.db_table)
+    created_at = Like._meta.get_field('created_at').get_db_prep_value(timezone.now(), connection)
+    cursor.execute(
+        f"""
+        INSERT INTO {like_table} (post_id, user_id, created_at)
+        SELECT id, %s, %s FROM {post_table} WHERE id = %s
+        ON CONFLICT (post_id, user_id) DO NOTHING
+        RETURNING id
+        """,
+        [user.id, created_at, post_id],
+    )
+    return cursor.fetchone() is not None
+
+
+def delete_like(cursor, connection, user, post_id):
+    """Delete the like if it exists, in one statement. Returns whether a row was deleted."""
+    like_table = connection.ops.quote_name(Like._meta.db_table)
+    cursor.execute(
+        f'DELETE FROM {like_table} WHERE post_id = %s AND user_id = %s RETURNING id',
+        [post_id, user.id],
+    )
+    return cursor.fetchone() is not None
+
+
+def update_post_returning(connection, post_id, delta):
+    """
+    Adjust the like counter (and hot score) and read the post back in the
+    same statement. Returns None if no row was updated.
+    """
+    queryset = Post.objects.using(connection.alias).filter(pk=post_id)
+    if delta < 0:
+        # Never push a drifted counter below zero; reconcile_counters repairs it
+        queryset = queryset.filter(likes_count__gte=-delta)
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values({
+        'likes_count': F('likes_count') + delta,
+        'hot_score': hot_score_update(likes_delta=delta),
+    })
+    sql, params = query.get_compiler(connection.alias).as_sql()
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in Post._meta.concrete_fields)
+    # A raw queryset so the returned columns go through the usual field converters
+    posts = list(Post.objects.db_manager(connection.alias).raw(f'{sql} RETURNING {columns}', params))
+    return posts[0] if posts else None
+
+
+def set_like(user, post_id, liked, using=DEFAULT_DB_ALIAS):
+    """
+    Make `user`'s like of `post_id` match `liked`. Idempotent and safe under
+    concurrent calls: two statements, the write and a read of the post with
+    its new likes_count, whichever way it goes.
+
+    Returns (post, changed); post is None if it doesn't exist.
+    """
+    connection = connections[using]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if liked:
+            changed = insert_like(cursor, connection, user, post_id)
+        else:
+            changed = delete_like(cursor, connection, user, post_id)
+        post = update_post_returning(connection, post_id, 1 if liked else -1) if changed else None
+    if post is None:
+        # Nothing changed, or a drifted counter was already at zero
+        post = Post.objects.using(using).filter(pk=post_id).first()
+    return post, changed
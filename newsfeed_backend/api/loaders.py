@@ -0,0 +1,198 @@
+import asyncio
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+
+from .models import Comment, Like
+
+
+class DataLoader:
+    """
+    Per-request batching loader.
+
+    Execution is synchronous, so a loader can't wait for sibling resolvers to
+    ask for their keys the way a JS DataLoader does. Instead, the resolver that
+    produces a list of parents queues all their keys up front with
+    `expect()`, and the first `load()` fetches every queued key in a single
+    batch. Anything loaded once is served from the per-request cache.
+    """
+
+    def __init__(self, batch_load_fn, default=None):
+        # batch_load_fn takes a list of keys and returns a dict of key -> value
+        self.batch_load_fn = batch_load_fn
+        self.default = default
+        self._cache = {}
+        self._queue = {}
+
+    def expect(self, keys):
+        # Queue keys so they are fetched together with the next load()
+        for key in keys:
+            if key not in self._cache:
+                self._queue[key] = None
+
+    def prime(self, key, value):
+        self._cache[key] = value
+
+    def clear(self, key):
+        self._cache.pop(key, None)
+
+    def load(self, key):
+        if key not in self._cache:
+            self._queue[key] = None
+            self._dispatch()
+        return self._cache[key]
+
+    def _dispatch(self):
+        keys = list(self._queue)
+        self._queue = {}
+        results = self.batch_load_fn(keys)
+        for key in keys:
+            self._cache[key] = results[key] if key in results else self._default_value()
+
+    def _default_value(self):
+        return self.default() if callable(self.default) else self.default
+
+
+class AsyncDataLoader(DataLoader):
+    """
+    DataLoader for the async executor.
+
+    `load()` returns a future. Every key requested while resolvers for the
+    same list are being started is collected, and the batch runs once on the
+    next turn of the event loop, in a worker thread since batch functions
+    use the ORM.
+    """
+
+    def __init__(self, batch_load_fn, default=None):
+        super().__init__(batch_load_fn, default)
+        self._futures = {}
+        # The event loop only keeps weak references to tasks, so a batch
+        # nobody holds on to could be collected with its futures unresolved
+        self._dispatch_tasks = set()
+
+    def load(self, key):
+        if key in self._cache:
+            return self._cache[key]
+
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._futures:
+                loop.call_soon(self._start_dispatch, loop)
+            future = self._futures[key] = loop.create_future()
+        return future
+
+    def _start_dispatch(self, loop):
+        task = loop.create_task(self._dispatch_async())
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch_async(self):
+        futures = self._futures
+        self._futures = {}
+        keys = list(dict.fromkeys([*self._queue, *futures]))
+        self._queue = {}
+
+        # Every future is resolved one way or another, or its resolver would wait forever
+        try:
+            results = await sync_to_async(self.batch_load_fn)(keys)
+            values = {key: results[key] if key in results else self._default_value() for key in keys}
+        except asyncio.CancelledError:
+            for future in futures.values():
+                future.cancel()
+            raise
+        except Exception as error:
+            # Raised by each load() instead of being logged as never retrieved
+            for future in futures.values():
+                future.set_exception(error)
+            return
+
+        for key in keys:
+            self._cache[key] = values[key]
+            if key in futures:
+                futures[key].set_result(values[key])
+
+
+def batch_users(user_ids):
+    return User.objects.in_bulk(user_ids)
+
+
+def batch_likes(post_ids):
+    likes = defaultdict(list)
+    for like in Like.objects.filter(post_id__in=post_ids).select_related('user'):
+        likes[like.post_id].append(like)
+    return likes
+
+
+def batch_comments(post_ids):
+    # Newest first, same as Post.comments
+    comments = defaultdict(list)
+    queryset = Comment.objects.filter(post_id__in=post_ids).select_related('author').order_by('-created_at')
+    for comment in queryset:
+        comments[comment.post_id].append(comment)
+    return comments
+
+
+class LikedPostIds:
+    """
+    The set of post ids the viewer has liked, limited to the posts this request
+    has asked about.
+
+    Every post id queued with `expect()` is resolved by a single
+    `post_id IN (...)` query the first time any `isLiked` is read, after which
+    each lookup is a set membership test. like/unlike mutations update the set
+    in place instead of invalidating it.
+    """
+
+    def __init__(self, user=None, loader_class=DataLoader):
+        self.user = user
+        self._loader = loader_class(self._fetch, default=False)
+
+    def expect(self, post_ids):
+        self._loader.expect(post_ids)
+
+    def contains(self, post_id):
+        # A bool, or an awaitable bool when backed by an AsyncDataLoader
+        if not self.user:
+            return False
+        return self._loader.load(post_id)
+
+    def __contains__(self, post_id):
+        return self.contains(post_id)
+
+    def add(self, post_id):
+        self._loader.prime(post_id, True)
+
+    def discard(self, post_id):
+        self._loader.prime(post_id, False)
+
+    def _fetch(self, post_ids):
+        liked = Like.objects.filter(user=self.user, post_id__in=post_ids).values_list('post_id', flat=True)
+        return {post_id: True for post_id in liked}
+
+
+class Loaders:
+    """
+    All the loaders for a single GraphQL request, bound to the viewer. The
+    async view passes AsyncDataLoader so the same resolvers return awaitables.
+    """
+
+    def __init__(self, user=None, loader_class=DataLoader):
+        self.user = user
+        self.users = loader_class(batch_users)
+        self.likes = loader_class(batch_likes, default=list)
+        self.comments = loader_class(batch_comments, default=list)
+        self.liked_post_ids = LikedPostIds(user, loader_class)
+
+    def expect_posts(self, posts):
+        # Called by list resolvers so nested Post fields are fetched in one batch
+        post_ids = [post.id for post in posts]
+        for loader in (self.likes, self.comments, self.liked_post_ids):
+            loader.expect(post_ids)
+        return posts
+
+    def clear_post(self, post_id):
+        # Mutations call this so the payload they return isn't served stale values
+        for loader in (self.likes, self.comments):
+            loader.clear(post_id)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.excerpts import backfill_excerpts
+from api.models import Post
+from api.response_cache import invalidate
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the stored feed excerpt of every post, e.g. after content was written without '
+        'Post.save() (update(), raw SQL) or after changing EXCERPT_LENGTH'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of posts to read and update at a time')
+
+    def handle(self, *args, **options):
+        changed = backfill_excerpts(Post.objects.all(), batch_size=options['batch_size'])
+        if changed:
+            # Cached feed pages carry the old excerpts
+            invalidate('posts')
+        self.stdout.write(self.style.SUCCESS(f'Updated {changed} excerpts'))
@@ -0,0 +1,99 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.benchmarks import OPERATIONS, compare, run_benchmarks
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / 'benchmark_baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the frontend's GraphQL operations through CustomGraphQLView on a freshly seeded "
+        "test database, reporting p50/p95 latency, SQL queries and peak memory, and fail on "
+        "regressions against a stored baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Users to seed')
+        parser.add_argument('--posts', type=int, default=2000, help='Posts to seed')
+        parser.add_argument('--comments', type=int, default=4000, help='Comments to seed')
+        parser.add_argument('--likes', type=int, default=20000, help='Likes to seed')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the dataset')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per operation')
+        parser.add_argument('--operation', action='append', help='Only run these operations (repeatable)')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON to compare against')
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--output', help='Also write the results as JSON to this file')
+        parser.add_argument('--latency-tolerance', type=float, default=0.5, help='Allowed p95 growth (0.5 = +50%%)')
+        parser.add_argument('--memory-tolerance', type=float, default=0.25, help='Allowed peak memory growth')
+
+    def handle(self, *args, **options):
+        operations = OPERATIONS
+        if options['operation']:
+            operations = [op for op in OPERATIONS if op.name in options['operation']]
+            unknown = set(options['operation']) - {op.name for op in operations}
+            if unknown:
+                raise CommandError(f"Unknown operations: {', '.join(sorted(unknown))}")
+
+        # Measure execution, not the shared response cache, and repeat operations past the rate limits
+        cache_settings = {**getattr(settings, 'GRAPHQL_RESPONSE_CACHE', {}), 'ENABLED': False}
+        rate_limit_settings = {**getattr(settings, 'GRAPHQL_RATE_LIMIT', {}), 'ENABLED': False}
+        # Always on a throwaway database: the operations write likes and comments as the benchmark user
+        with override_settings(GRAPHQL_RESPONSE_CACHE=cache_settings, GRAPHQL_RATE_LIMIT=rate_limit_settings):
+            results = self.run_on_test_database(options, operations)
+
+        self.report(results)
+        data = {result.name: result.as_dict() for result in results}
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(data, indent=2) + '\n')
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            # Keep entries for operations that weren't run this time
+            baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+            baseline.update(data)
+            baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Saved baseline to {baseline_path}'))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}, nothing to compare'))
+            return
+        regressions = compare(
+            results,
+            json.loads(baseline_path.read_text()),
+            latency_tolerance=options['latency_tolerance'],
+            memory_tolerance=options['memory_tolerance'],
+        )
+        if regressions:
+            raise CommandError('Regressions against the baseline:\n - ' + '\n - '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def run_on_test_database(self, options, operations):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(
+                f"Seeding {options['posts']} posts, {options['comments']} comments, {options['likes']} likes..."
+            )
+            call_command(
+                'seed_data', bulk=True, seed=options['seed'], users=options['users'], posts=options['posts'],
+                comments=options['comments'], likes=options['likes'], stdout=StringIO(),
+            )
+            return run_benchmarks(options['iterations'], operations)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def report(self, results):
+        self.stdout.write(f"{'operation':<18}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}{'peak KB':>12}")
+        for result in results:
+            row = result.as_dict()
+            self.stdout.write(
+                f"{result.name:<18}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['queries']:>10}{row['peak_memory_kb']:>12}"
+            )
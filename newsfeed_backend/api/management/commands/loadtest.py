@@ -0,0 +1,271 @@
+import asyncio
+import io
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.test.utils import override_settings
+
+# The query the frontend's post list sends
+FEED_QUERY = '''
+query GetAllPosts {
+  allPosts {
+    id
+    title
+    contentPreview
+    contentTruncated
+    author { id username }
+    createdAt
+    updatedAt
+    isAuthor
+    likesCount
+    commentsCount
+    isLiked
+    __typename
+  }
+}
+'''
+
+LIKE_MUTATION = 'mutation LikePost($postId: ID!) { likePost(postId: $postId) { id likesCount isLiked } }'
+UNLIKE_MUTATION = 'mutation UnlikePost($postId: ID!) { unlikePost(postId: $postId) { id likesCount isLiked } }'
+
+# Django's own SQLite behaviour, without the tuning in settings.py: rollback
+# journal, deferred transactions and a new connection per request
+STOCK_SQLITE = {'CONN_MAX_AGE': 0, 'OPTIONS': {'init_command': 'PRAGMA journal_mode=DELETE'}}
+
+
+def failed(status, body):
+    # Resolvers report many failures as a null field rather than an error
+    if status != 200:
+        return True
+    result = json.loads(body)
+    data = result.get('data')
+    return bool(result.get('errors')) or not data or None in data.values()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare GraphQL requests/sec through the WSGI (sync) and ASGI (async) applications, '
+        'for the post list query or for concurrent likePost writes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Number of requests per application')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight at once')
+        parser.add_argument('--mode', choices=['wsgi', 'asgi', 'both'], default='both')
+        parser.add_argument('--query-file', help='File with the GraphQL query to send (default: the post list query)')
+        parser.add_argument('--username', help='Send requests authenticated as this user')
+        parser.add_argument(
+            '--likes', action='store_true',
+            help='Send likePost mutations from many users at once (each a real write), then unlike them again',
+        )
+        parser.add_argument(
+            '--stock-sqlite', action='store_true',
+            help="Run with Django's default SQLite settings instead of the tuned ones, for comparison",
+        )
+        parser.add_argument(
+            '--response-cache', action='store_true',
+            help='Leave the shared response cache on (off by default so every request executes)',
+        )
+
+    def handle(self, *args, **options):
+        query = FEED_QUERY
+        if options['query_file']:
+            with open(options['query_file']) as f:
+                query = f.read()
+        self.host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost').lstrip('.')
+
+        authorization = None
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['username']}' does not exist")
+            authorization = self.authorization(user)
+
+        cache_settings = {**getattr(settings, 'GRAPHQL_RESPONSE_CACHE', {}), 'ENABLED': options['response_cache']}
+        modes = ['wsgi', 'asgi'] if options['mode'] == 'both' else [options['mode']]
+        total = options['requests']
+        # Load comes from one address, which the rate limits would otherwise cut off
+        rate_limit_settings = {**getattr(settings, 'GRAPHQL_RATE_LIMIT', {}), 'ENABLED': False}
+        with override_settings(
+            GRAPHQL_RESPONSE_CACHE=cache_settings, GRAPHQL_RATE_LIMIT=rate_limit_settings, ALLOWED_HOSTS=[self.host]
+        ):
+            with self.database_settings(options['stock_sqlite']):
+                for mode in modes:
+                    runner = self.run_wsgi if mode == 'wsgi' else self.run_asgi
+                    if options['likes']:
+                        self.run_likes(mode, runner, total, options['concurrency'])
+                        continue
+                    payload = self.payload(query, {}, authorization)
+                    # One untimed request so imports and first-query setup don't count
+                    runner([payload], 1)
+                    self.report(mode, *runner([payload] * total, options['concurrency']))
+
+    def authorization(self, user):
+        from api.schema import generate_token
+        return f'JWT {generate_token(user)}'
+
+    def payload(self, query, variables, authorization):
+        return json.dumps({'query': query, 'variables': variables}).encode(), authorization
+
+    def run_likes(self, mode, runner, total, concurrency):
+        # Distinct (user, post) pairs nobody has liked yet, so every request inserts a row
+        from api.models import Like, Post
+        users = list(User.objects.order_by('id')[:max(concurrency, 1)])
+        if not users:
+            raise CommandError('No users to send likes as, run seed_data first')
+        tokens = {user.id: self.authorization(user) for user in users}
+        pairs = []
+        for user in users:
+            posts = Post.objects.exclude(likes__user=user).order_by('-id').values_list('id', flat=True)
+            pairs.extend((user.id, post_id) for post_id in posts[:total // len(users) + 1])
+        pairs = pairs[:total + 1]
+        if len(pairs) < total + 1:
+            raise CommandError(f'Only {len(pairs)} unliked (user, post) pairs, seed more posts or send fewer requests')
+        # Interleave users so concurrent requests come from different people, as in production
+        pairs.sort(key=lambda pair: pair[1])
+
+        def payloads(query):
+            return [self.payload(query, {'postId': post_id}, tokens[user_id]) for user_id, post_id in pairs]
+
+        likes, unlikes = payloads(LIKE_MUTATION), payloads(UNLIKE_MUTATION)
+        runner(likes[:1], 1)
+        self.report(f'{mode} likePost', *runner(likes[1:], concurrency))
+        # Put the database back the way it was
+        runner(unlikes[:1], 1)
+        self.report(f'{mode} unlikePost', *runner(unlikes[1:], concurrency))
+        remaining = Like.objects.filter(user_id__in=tokens, post_id__in=[post_id for _, post_id in pairs])
+        leftover = len(set(remaining.values_list('user_id', 'post_id')) & set(pairs))
+        if leftover:
+            self.stdout.write(self.style.WARNING(f'{leftover} likes could not be removed'))
+
+    @contextmanager
+    def database_settings(self, stock_sqlite):
+        connection = connections['default']
+        if not stock_sqlite:
+            yield
+            return
+        if connection.vendor != 'sqlite':
+            raise CommandError('--stock-sqlite only applies to SQLite')
+        original = connection.settings_dict.copy()
+        # Every thread's connection is opened from this same settings dict
+        connection.settings_dict.update(STOCK_SQLITE)
+        connection.close()
+        try:
+            yield
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+            # The journal mode is stored in the database file; reconnecting
+            # with the tuned settings switches it back to WAL
+            connection.ensure_connection()
+
+    def report(self, label, elapsed, latencies, errors):
+        latencies = sorted(latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f'{label.upper()}: {len(latencies)} requests in {elapsed:.2f}s, '
+            f'{len(latencies) / elapsed:.1f} req/s, '
+            f'p50 {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, '
+            f'{errors} errors'
+        )
+
+    def run_wsgi(self, payloads, concurrency):
+        from wsgi import application
+
+        def request(payload):
+            body, authorization = payload
+            environ = {
+                'REQUEST_METHOD': 'POST',
+                'PATH_INFO': '/graphql/',
+                'QUERY_STRING': '',
+                'SERVER_NAME': self.host,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'REMOTE_ADDR': '127.0.0.1',
+                'CONTENT_TYPE': 'application/json',
+                'CONTENT_LENGTH': str(len(body)),
+                'HTTP_HOST': self.host,
+                'wsgi.input': io.BytesIO(body),
+                'wsgi.url_scheme': 'http',
+                'wsgi.errors': io.StringIO(),
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            if authorization:
+                environ['HTTP_AUTHORIZATION'] = authorization
+            status = []
+            start = time.perf_counter()
+            chunks = application(environ, lambda s, h, exc_info=None: status.append(s))
+            content = b''.join(chunks)
+            latency = time.perf_counter() - start
+            close_old_connections()
+            return latency, failed(int(status[0].split()[0]), content)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(request, payloads))
+        elapsed = time.perf_counter() - start
+        return elapsed, [latency for latency, _ in results], sum(failed for _, failed in results)
+
+    def run_asgi(self, payloads, concurrency):
+        from asgi import application
+
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'POST',
+            'scheme': 'http',
+            'path': '/graphql/',
+            'raw_path': b'/graphql/',
+            'root_path': '',
+            'query_string': b'',
+            'client': ('127.0.0.1', 0),
+            'server': (self.host, 80),
+        }
+
+        async def request(semaphore, payload):
+            body, authorization = payload
+            headers = [(b'host', self.host.encode()), (b'content-type', b'application/json')]
+            if authorization:
+                headers.append((b'authorization', authorization.encode()))
+            messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # Stay connected until the handler stops listening for a disconnect
+                await asyncio.Future()
+
+            status = []
+            content = []
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif message['type'] == 'http.response.body':
+                    content.append(message.get('body', b''))
+
+            async with semaphore:
+                start = time.perf_counter()
+                await application({**scope, 'headers': headers}, receive, send)
+                return time.perf_counter() - start, failed(status[0], b''.join(content))
+
+        async def run():
+            # All requests share one event loop, as under a single uvicorn worker
+            semaphore = asyncio.Semaphore(concurrency)
+            start = time.perf_counter()
+            results = await asyncio.gather(*[request(semaphore, payload) for payload in payloads])
+            return time.perf_counter() - start, results
+
+        elapsed, results = asyncio.run(run())
+        return elapsed, [latency for latency, _ in results], sum(failed for _, failed in results)
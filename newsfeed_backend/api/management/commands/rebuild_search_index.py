@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from api.models import Comment, Post
+from api.response_cache import invalidate
+from api.search import get_backend, index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the full-text search documents of every post and comment, e.g. after rows were written without '
+        'signals (bulk_create, raw SQL, loaddata). Searches keep working while it runs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of rows to index per transaction')
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        backend = get_backend(connection)
+        if backend is None:
+            self.stdout.write(self.style.WARNING(f'Full-text search is not supported on {connection.vendor}'))
+            return
+
+        posts = self.index_table(Post, 'post_ids', options['batch_size'])
+        comments = self.index_table(Comment, 'comment_ids', options['batch_size'])
+
+        with connection.cursor() as cursor:
+            backend.prune(cursor)
+        # Cached searchPosts results predate the new documents
+        invalidate('posts')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {posts} posts and {comments} comments'))
+
+    def index_table(self, model, argument, batch_size):
+        indexed = 0
+        last_id = 0
+        # Walk the table in primary key order, replacing each batch's documents in place
+        while True:
+            batch = list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            with transaction.atomic():
+                index(**{argument: batch})
+            indexed += len(batch)
+        return indexed
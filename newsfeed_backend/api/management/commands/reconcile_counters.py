@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from api.models import Post, Comment, Like
+from api.ranking import hot_score
+from api.response_cache import invalidate_posts
+
+
+def actual_count(model):
+    # Correlated COUNT(*) of `model` rows pointing at the outer post
+    counts = model.objects.filter(post=OuterRef('pk')).values('post').annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized Post.likes_count / Post.comments_count columns and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of posts to check per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted posts, do not fix them')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = 0
+        fixed = 0
+        last_id = 0
+
+        # Walk the table in primary key order so each batch is an index range scan
+        while True:
+            batch = list(
+                Post.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1]
+            checked += len(batch)
+
+            drifted = list(
+                Post.objects.filter(id__in=batch)
+                .annotate(actual_likes=actual_count(Like), actual_comments=actual_count(Comment))
+                .exclude(likes_count=F('actual_likes'), comments_count=F('actual_comments'))
+                .values_list('id', flat=True)
+            )
+            if not drifted:
+                continue
+
+            fixed += len(drifted)
+            if options['dry_run']:
+                self.stdout.write(f"Drifted posts: {', '.join(str(post_id) for post_id in drifted)}")
+                continue
+
+            # Recount in the UPDATE itself so concurrent likes/comments aren't overwritten with stale values
+            Post.objects.filter(id__in=drifted).update(
+                likes_count=actual_count(Like),
+                comments_count=actual_count(Comment),
+            )
+            # The hot score's engagement term was built from the drifted counters
+            posts = list(Post.objects.filter(id__in=drifted).only('likes_count', 'comments_count', 'created_at'))
+            for post in posts:
+                post.hot_score = hot_score(post.likes_count, post.comments_count, post.created_at)
+            Post.objects.bulk_update(posts, ['hot_score'])
+            # Cached results and ETags still carry the drifted counts
+            invalidate_posts(*drifted)
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} posts. {verb} {fixed} with drifted counters.'))
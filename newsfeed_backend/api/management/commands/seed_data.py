@@ -1,14 +1,165 @@
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from datetime import timedelta
+import django
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db import connections, transaction
 from django.utils import timezone
 from api.models import Post, Comment, Like
+from api.excerpts import make_excerpt
+from api.ranking import hot_score
+from api import search
 from faker import Faker
 
 # Initialize Faker with English locale
 fake = Faker('en_US')
 
+# Size of the Faker text pools used by --bulk; posts and comments are
+# assembled from these instead of calling Faker per row
+TEXT_POOL_SIZE = 2000
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk_create write the generated created_at/updated_at values instead of
+    auto_now/auto_now_add replacing them all with the current time.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class TextPool:
+    """Faker output generated once up front, recombined at random per row."""
+
+    def __init__(self, seed):
+        faker = Faker('en_US')
+        faker.seed_instance(seed)
+        self.titles = [faker.sentence(nb_words=faker.random_int(4, 10)).rstrip('.') for _ in range(TEXT_POOL_SIZE)]
+        self.headings = [faker.catch_phrase() for _ in range(TEXT_POOL_SIZE // 10)]
+        self.paragraphs = [faker.paragraph(nb_sentences=3 + i % 6) for i in range(TEXT_POOL_SIZE)]
+        self.comments = [faker.paragraph(nb_sentences=1 + i % 3) for i in range(TEXT_POOL_SIZE)]
+
+    def post_content(self, rng):
+        # Same shape as the regular generator: 3-7 paragraphs, some with headings
+        parts = []
+        for _ in range(rng.randint(3, 7)):
+            if rng.random() > 0.6:
+                parts.append(f"## {rng.choice(self.headings)}")
+            parts.append(rng.choice(self.paragraphs))
+        return '\n\n'.join(parts)
+
+
+@lru_cache(maxsize=None)
+def text_pool(seed):
+    # One pool per process, shared by every slice it generates
+    return TextPool(seed)
+
+
+def spread(total, buckets, rng):
+    """Split `total` over `buckets`: an even baseline plus the remainder at random."""
+    if buckets <= 0:
+        return []
+    counts = [total // buckets] * buckets
+    for index in rng.choices(range(buckets), k=total - sum(counts)):
+        counts[index] += 1
+    return counts
+
+
+def seed_post_slice(task):
+    """
+    Create one slice of posts with their comments and likes. Runs in a worker
+    process when --workers > 1, so everything it needs comes in `task`.
+    """
+    rng = random.Random(f"{task['seed']}:{task['index']}")
+    pool = text_pool(task['seed'])
+    user_ids = task['user_ids']
+    batch_size = task['batch_size']
+    now = task['now']
+    max_age = 30 * 24 * 3600
+
+    # Counters are known before anything is inserted, so they are written
+    # with the posts instead of being recounted afterwards
+    like_counts = [min(count, len(user_ids)) for count in spread(task['likes'], task['posts'], rng)]
+    comment_counts = spread(task['comments'], task['posts'], rng)
+
+    posts = []
+    for i in range(task['posts']):
+        created_at = now - timedelta(seconds=rng.randint(3600, max_age))
+        # Title before content, keeping the random sequence of earlier seeds
+        title = rng.choice(pool.titles)
+        content = pool.post_content(rng)
+        # bulk_create skips Post.save(), which sets the excerpt
+        excerpt, excerpt_truncated = make_excerpt(content)
+        posts.append(Post(
+            title=title,
+            content=content,
+            excerpt=excerpt,
+            excerpt_truncated=excerpt_truncated,
+            author_id=rng.choice(user_ids),
+            created_at=created_at,
+            updated_at=created_at + timedelta(seconds=rng.randint(0, 24 * 3600)),
+            likes_count=like_counts[i],
+            comments_count=comment_counts[i],
+            hot_score=hot_score(like_counts[i], comment_counts[i], created_at),
+        ))
+
+    def later_than(post):
+        return post.created_at + (now - post.created_at) * rng.random()
+
+    with explicit_timestamps(Post, Comment, Like), transaction.atomic():
+        Post.objects.bulk_create(posts, batch_size=batch_size)
+
+        comments = []
+        comment_ids = []
+        likes = []
+        for post, like_count, comment_count in zip(posts, like_counts, comment_counts):
+            for _ in range(comment_count):
+                created_at = later_than(post)
+                comments.append(Comment(
+                    post_id=post.id, author_id=rng.choice(user_ids), content=rng.choice(pool.comments),
+                    created_at=created_at, updated_at=created_at,
+                ))
+            # Distinct likers per post, so (post, user) stays unique without asking the database
+            for user_id in rng.sample(user_ids, like_count):
+                likes.append(Like(post_id=post.id, user_id=user_id, created_at=later_than(post)))
+            if len(likes) >= batch_size:
+                Like.objects.bulk_create(likes, batch_size=batch_size)
+                likes = []
+            if len(comments) >= batch_size:
+                Comment.objects.bulk_create(comments, batch_size=batch_size)
+                comment_ids += [comment.id for comment in comments]
+                comments = []
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+        comment_ids += [comment.id for comment in comments]
+        Like.objects.bulk_create(likes, batch_size=batch_size)
+        # bulk_create sends no signals, so index the slice's posts and comments here
+        search.index([post.id for post in posts], comment_ids)
+
+    return task['posts'], sum(comment_counts), sum(like_counts)
+
+
+def setup_worker():
+    # Worker processes start fresh and need their own app registry and connections
+    django.setup()
+
+
 class Command(BaseCommand):
     help = 'Seed the database with realistic mock users, posts, comments, and likes'
 
@@ -18,8 +169,19 @@ class Command(BaseCommand):
         parser.add_argument('--comments', type=int, default=100, help='Number of comments to create')
         parser.add_argument('--likes', type=int, default=200, help='Number of likes to create')
         parser.add_argument('--clear', action='store_true', help='Clear existing data before seeding')
+        parser.add_argument('--seed', type=int, help='Random seed, for reproducible datasets')
+        parser.add_argument('--bulk', action='store_true', help='Insert with bulk_create in batches (for large datasets)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT in --bulk mode')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes generating posts in parallel in --bulk mode (SQLite serializes the writes)',
+        )
 
     def handle(self, *args, **options):
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+            fake.seed_instance(options['seed'])
+
         if options['clear']:
             self.stdout.write('Clearing existing data...')
             Like.objects.all().delete()
@@ -33,6 +195,9 @@ class Command(BaseCommand):
             User.objects.create_superuser(username='admin', email='admin@example.com', password='admin')
             self.stdout.write(self.style.SUCCESS('Created admin user'))
 
+        if options['bulk']:
+            return self.handle_bulk(options)
+
         # Create users with Faker
         num_users = options['users']
         created_users = []
@@ -206,6 +371,9 @@ class Command(BaseCommand):
                 created_at=like_time
             )
             like_count += 1
+        
+        # Comments and likes are inserted directly, so bring the Post counters up to date
+        call_command('reconcile_counters', stdout=self.stdout)
             
         # Print summary stats
         self.stdout.write(self.style.SUCCESS(
@@ -219,3 +387,79 @@ class Command(BaseCommand):
             'Mock data has been generated and is stored in the database.'
             '\nThis data will persist and be available when the code is pushed to GitHub.'
         ))
+
+    def handle_bulk(self, options):
+        started = time.monotonic()
+        seed = options['seed'] if options['seed'] is not None else random.randrange(2 ** 32)
+        fake.seed_instance(seed)
+        batch_size = options['batch_size']
+
+        # Users: uniqueness checked against an in-memory set, one shared password hash
+        taken = set(User.objects.values_list('username', flat=True))
+        password = make_password('password')
+        users = []
+        for _ in range(options['users']):
+            profile = fake.simple_profile()
+            username = original = profile['username'].replace('.', '_').lower()
+            suffix = 1
+            while username in taken:
+                username = f"{original}_{suffix}"
+                suffix += 1
+            taken.add(username)
+            first_name, _, last_name = profile['name'].partition(' ')
+            users.append(User(
+                username=username, email=profile['mail'], password=password,
+                first_name=first_name, last_name=last_name,
+            ))
+        User.objects.bulk_create(users, batch_size=batch_size)
+        self.stdout.write(f"Created {len(users)} users")
+
+        user_ids = list(User.objects.values_list('id', flat=True))
+        if not user_ids:
+            self.stdout.write(self.style.ERROR('No users to author posts'))
+            return
+
+        # Posts (with their comments and likes) in independent slices
+        num_posts = options['posts']
+        slice_size = batch_size * 4
+        num_slices = max(1, -(-num_posts // slice_size))
+        tasks = []
+        for index in range(num_slices):
+            start = index * num_posts // num_slices
+            end = (index + 1) * num_posts // num_slices
+            tasks.append({
+                'index': index,
+                'seed': seed,
+                'posts': end - start,
+                'comments': options['comments'] * end // num_posts - options['comments'] * start // num_posts,
+                'likes': options['likes'] * end // num_posts - options['likes'] * start // num_posts,
+                'user_ids': user_ids,
+                'batch_size': batch_size,
+                'now': timezone.now(),
+            })
+        tasks = [task for task in tasks if task['posts']]
+
+        totals = [0, 0, 0]
+        if options['workers'] > 1:
+            # Don't hand our open connection to the workers
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=setup_worker) as executor:
+                results = executor.map(seed_post_slice, tasks)
+                self.collect(results, totals, started)
+        else:
+            self.collect(map(seed_post_slice, tasks), totals, started)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully created (seed {seed}) in {time.monotonic() - started:.1f}s:'
+            f'\n - {len(users)} new users'
+            f'\n - {totals[0]} posts'
+            f'\n - {totals[1]} comments'
+            f'\n - {totals[2]} likes'
+        ))
+
+    def collect(self, results, totals, started):
+        for posts, comments, likes in results:
+            totals[0] += posts
+            totals[1] += comments
+            totals[2] += likes
+            self.stdout.write(f"{totals[0]} posts, {totals[1]} comments, {totals[2]} likes ({time.monotonic() - started:.1f}s)")
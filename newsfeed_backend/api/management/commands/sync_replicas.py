@@ -0,0 +1,43 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.routing import replica_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database over the SQLite files standing in for read replicas '
+        '(DATABASE_REPLICA_FILES). Real replicas are kept up to date by the database server.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replica', action='append', help='Only refresh these aliases (repeatable)')
+
+    def handle(self, *args, **options):
+        aliases = options['replica'] or replica_aliases()
+        if not aliases:
+            self.stdout.write('No read replicas configured, set DATABASE_REPLICA_FILES')
+            return
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('sync_replicas only copies SQLite databases')
+        primary.ensure_connection()
+
+        for alias in aliases:
+            if alias not in replica_aliases():
+                raise CommandError(f'{alias} is not a configured replica')
+            replica = connections[alias]
+            if replica.vendor != 'sqlite':
+                raise CommandError(f'{alias} is not an SQLite database')
+            # Close our own connection first so the copy isn't hidden behind it
+            replica.close()
+            # The online backup API copies a consistent snapshot while the primary stays writable
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'Copied {DEFAULT_DB_ALIAS} to {alias} ({replica.settings_dict["NAME"]})')
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('api', 'Post')
+    Like = apps.get_model('api', 'Like')
+    Comment = apps.get_model('api', 'Comment')
+
+    def count_of(model):
+        counts = model.objects.filter(post=OuterRef('pk')).values('post').annotate(count=Count('id')).values('count')
+        return Coalesce(Subquery(counts), 0)
+
+    Post.objects.update(likes_count=count_of(Like), comments_count=count_of(Comment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+from django.db import migrations
+
+# The index as it was when this migration was written: one document per post
+# (title and content) and one per comment. The statements are inlined rather
+# than imported from api.search, so later changes to that module can't change
+# what this migration does.
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE api_post_search USING fts5(title, content, tokenize='porter unicode61')",
+    "CREATE VIRTUAL TABLE api_comment_search USING fts5(content, post_id UNINDEXED, tokenize='porter unicode61')",
+    # Index the posts and comments that already exist
+    'INSERT INTO api_post_search (rowid, title, content) SELECT id, title, content FROM api_post',
+    'INSERT INTO api_comment_search (rowid, content, post_id) SELECT id, content, post_id FROM api_comment',
+]
+
+POSTGRESQL_CREATE = [
+    """
+    CREATE TABLE api_post_search (
+        post_id bigint PRIMARY KEY REFERENCES api_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+        document tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX api_post_search_document ON api_post_search USING GIN (document)',
+    """
+    CREATE TABLE api_comment_search (
+        comment_id bigint PRIMARY KEY
+            REFERENCES api_comment (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+        post_id bigint NOT NULL,
+        document tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX api_comment_search_document ON api_comment_search USING GIN (document)',
+    """
+    INSERT INTO api_post_search (post_id, document)
+    SELECT id, setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', content), 'B')
+    FROM api_post
+    """,
+    """
+    INSERT INTO api_comment_search (comment_id, post_id, document)
+    SELECT id, post_id, setweight(to_tsvector('english', content), 'C')
+    FROM api_comment
+    """,
+]
+
+CREATE = {
+    'sqlite': SQLITE_CREATE,
+    'postgresql': POSTGRESQL_CREATE,
+}
+
+
+def create_search_index(apps, schema_editor):
+    # Other databases have no full-text search
+    for statement in CREATE.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE:
+        schema_editor.execute('DROP TABLE IF EXISTS api_comment_search')
+        schema_editor.execute('DROP TABLE IF EXISTS api_post_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_feed_access_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:05
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+# api.ranking.hot_score as it was when this migration was written, copied so
+# that later changes to the formula can't change this migration
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+DECAY_SECONDS = 45000
+COMMENT_WEIGHT = 2
+
+
+def hot_score(likes, comments, created_at):
+    engagement = 1 + likes + COMMENT_WEIGHT * comments
+    return math.log10(engagement) + (created_at - EPOCH).total_seconds() / DECAY_SECONDS
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Post = apps.get_model('api', 'Post')
+    last_id = 0
+    while True:
+        batch = list(Post.objects.filter(id__gt=last_id).order_by('id')[:1000])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for post in batch:
+            post.hot_score = hot_score(post.likes_count, post.comments_count, post.created_at)
+        Post.objects.bulk_update(batch, ['hot_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_post_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-hot_score', '-id'], name='post_hot_score_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:22
+
+import re
+
+from django.db import migrations, models
+
+# api.excerpts as it was when this migration was written, copied so that later
+# changes to the excerpt rules can't change this migration
+EXCERPT_LENGTH = 280
+ELLIPSIS = '…'
+HEADING_MARKER = re.compile(r'^\s*#+\s*', re.MULTILINE)
+
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    text = ' '.join(HEADING_MARKER.sub('', content).split())
+    if len(text) <= length:
+        return text, False
+    cut = text[:length - len(ELLIPSIS) + 1]
+    if ' ' in cut:
+        cut = cut[:cut.rindex(' ')]
+    else:
+        cut = cut[:-1]
+    return cut.rstrip(' .,;:-') + ELLIPSIS, True
+
+
+def backfill(apps, schema_editor):
+    Post = apps.get_model('api', 'Post')
+    posts = Post.objects.using(schema_editor.connection.alias)
+    last_id = 0
+    while True:
+        batch = list(posts.filter(id__gt=last_id).order_by('id').only('id', 'content')[:1000])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for post in batch:
+            post.excerpt, post.excerpt_truncated = make_excerpt(post.content)
+        posts.bulk_update(batch, ['excerpt', 'excerpt_truncated'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_post_hot_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', max_length=280),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
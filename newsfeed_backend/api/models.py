@@ -1,5 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .excerpts import EXCERPT_LENGTH, make_excerpt
+from .ranking import hot_score
 
 # Create your models here.
 
@@ -9,17 +13,46 @@ class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, kept in sync atomically by the like/comment mutations.
+    # Run `manage.py reconcile_counters` to repair drift (e.g. after bulk deletes).
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # Time-decayed popularity for topPosts, see api/ranking.py. Set when the
+    # post is created and adjusted along with the counters.
+    hot_score = models.FloatField(default=0)
+    # Plain-text start of the content for feed cards, see api/excerpts.py.
+    # Recomputed whenever the content is saved.
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, default='')
+    excerpt_truncated = models.BooleanField(default=False)
+
+    class Meta:
+        # Feeds list the newest posts first
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Keyset pagination of the feed seeks on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            # An author's recent posts: follow backfill and merging high-follower authors into home feeds
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_created_idx'),
+            # topPosts reads the first K entries of this index
+            models.Index(fields=['-hot_score', '-id'], name='post_hot_score_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            created_at = self.created_at
+            # auto_now_add replaces any given created_at with the current time
+            if created_at is None or self._meta.get_field('created_at').auto_now_add:
+                created_at = timezone.now()
+            self.hot_score = hot_score(self.likes_count, self.comments_count, created_at)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.excerpt, self.excerpt_truncated = make_excerpt(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt', 'excerpt_truncated'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
-        
-    @property
-    def likes_count(self):
-        return self.likes.count()
-        
-    @property
-    def comments_count(self):
-        return self.comments.count()
 
 
 class Comment(models.Model):
@@ -29,6 +62,14 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Newest comments first, like the comments resolvers
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Keyset pagination of a post's comments seeks on (post, created_at, id)
+            models.Index(fields=['post', '-created_at', '-id'], name='comment_post_created_id_idx'),
+        ]
+
     def __str__(self):
         return f'Comment by {self.author.username} on {self.post.title}'
 
@@ -39,5 +80,46 @@ class Like(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        # Ensure a user can only like a post once
+        # Ensure a user can only like a post once. The unique index on
+        # (post, user) also serves a post's likes and single-like probes.
         unique_together = ('post', 'user')
+        indexes = [
+            # The viewer's liked posts (isLiked): covers user_id = ? AND post_id IN (...)
+            # without touching the table
+            models.Index(fields=['user', 'post'], name='like_user_post_idx'),
+        ]
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following')
+    followee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='followers')
+    # True once the followee has too many followers to fan out on write; their
+    # posts are then merged into this follower's home feed at read time instead
+    fanout_on_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # A user can only follow another user once
+        unique_together = ('follower', 'followee')
+        indexes = [
+            # Home feed reads look up the high-follower accounts a user follows
+            models.Index(
+                fields=['follower'],
+                condition=models.Q(fanout_on_read=True),
+                name='follow_fanout_on_read_idx',
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """A post materialized into one user's home timeline (fan-out on write)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    # Copy of post.created_at so a page of the timeline is a single index range scan
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_created_idx'),
+        ]
@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from graphql import GraphQLError
+
+# Page size used when the client doesn't pass `first`, and the hard cap on it
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Keyset used by every feed-style connection: newest first, id breaks ties
+DEFAULT_ORDERING = ('created_at', 'id')
+
+
+def encode_cursor(values):
+    # Cursors are opaque to clients: a base64 encoded JSON list of the key values
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor_values(cursor, length):
+    # The raw JSON values of a cursor that should hold `length` of them
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise GraphQLError("Invalid cursor") from None
+
+    if not isinstance(values, list) or len(values) != length:
+        raise GraphQLError("Invalid cursor")
+    return values
+
+
+def decode_cursor(cursor, model, keys):
+    values = decode_cursor_values(cursor, len(keys))
+
+    # Turn the JSON values back into something the ORM can compare against
+    decoded = []
+    for key, value in zip(keys, values):
+        field = model._meta.get_field(key)
+        try:
+            if isinstance(field, models.DateTimeField):
+                value = parse_datetime(value) if isinstance(value, str) else None
+            elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+                value = field.to_python(value)
+            else:
+                value = None
+        except (ValidationError, ValueError, TypeError):
+            value = None
+        if value is None:
+            raise GraphQLError("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def page_size(first):
+    if first is None:
+        return DEFAULT_PAGE_SIZE
+    if first < 0:
+        raise GraphQLError("`first` must be a non-negative integer")
+    return min(first, MAX_PAGE_SIZE)
+
+
+def keyset_filter(keys, values):
+    # Builds (k1 < v1) OR (k1 = v1 AND k2 < v2) OR ... for a descending keyset
+    condition = Q()
+    for i, key in enumerate(keys):
+        clause = Q(**{f'{key}__lt': values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            clause &= Q(**{prev_key: prev_value})
+        condition |= clause
+    return condition
+
+
+def paginate(queryset, first=None, after=None, keys=DEFAULT_ORDERING):
+    """
+    Keyset (seek) pagination over `keys` in descending order.
+
+    Instead of OFFSET, the cursor carries the key values of the last row the
+    client saw, so every page is a bounded index range scan no matter how deep
+    into the list the client is.
+    """
+    page, limit = keyset_page(queryset, first, after, keys)
+    return build_connection(list(page), limit, after, lambda row: [getattr(row, key) for key in keys])
+
+
+async def apaginate(queryset, first=None, after=None, keys=DEFAULT_ORDERING):
+    # Same as paginate(), evaluated with the async ORM
+    page, limit = keyset_page(queryset, first, after, keys)
+    rows = [row async for row in page]
+    return build_connection(rows, limit, after, lambda row: [getattr(row, key) for key in keys])
+
+
+def keyset_page(queryset, first, after, keys):
+    limit = page_size(first)
+
+    if after:
+        values = decode_cursor(after, queryset.model, keys)
+        queryset = queryset.filter(keyset_filter(keys, values))
+
+    # Fetch one extra row to find out if there is a next page
+    return queryset.order_by(*[f'-{key}' for key in keys])[:limit + 1], limit
+
+
+def build_connection(rows, limit, after, cursor_values):
+    """
+    Shape up to `limit + 1` rows as a Relay connection. The extra row, if
+    present, only tells us there is a next page.
+    """
+    has_next_page = len(rows) > limit
+    edges = [{'cursor': encode_cursor(cursor_values(row)), 'node': row} for row in rows[:limit]]
+
+    return {
+        'edges': edges,
+        'pageInfo': {
+            'hasNextPage': has_next_page,
+            'hasPreviousPage': bool(after),
+            'startCursor': edges[0]['cursor'] if edges else None,
+            'endCursor': edges[-1]['cursor'] if edges else None,
+        },
+    }
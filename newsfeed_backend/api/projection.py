@@ -0,0 +1,118 @@
+from graphql import get_named_type
+from graphql.execution.collect_fields import collect_sub_fields
+
+# Which model fields each GraphQL field reads, so root resolvers can load only
+# the columns a query selects (Post.content is by far the widest). A tuple
+# lists plain columns, a Related is a foreign key followed with
+# select_related and projected in turn. Fields resolved through the loaders
+# or from the primary key read nothing. A selected field missing from its map
+# turns projection off for that object, so a new GraphQL field can never
+# trigger a deferred load per row; add it here when adding it to the schema.
+
+
+class Related:
+    def __init__(self, field, fields):
+        self.field = field
+        self.fields = fields
+
+
+USER_FIELDS = {
+    'id': (),
+    'username': ('username',),
+    'email': ('email',),
+    'firstName': ('first_name',),
+    'lastName': ('last_name',),
+}
+
+POST_FIELDS = {
+    'id': (),
+    'title': ('title',),
+    'content': ('content',),
+    'contentPreview': ('excerpt',),
+    'contentTruncated': ('excerpt_truncated',),
+    'author': Related('author', USER_FIELDS),
+    'createdAt': ('created_at',),
+    'updatedAt': ('updated_at',),
+    'isAuthor': ('author',),
+    'likesCount': ('likes_count',),
+    'commentsCount': ('comments_count',),
+    'likes': (),
+    'comments': (),
+    'commentsConnection': (),
+    'isLiked': (),
+}
+
+COMMENT_FIELDS = {
+    'id': (),
+    'content': ('content',),
+    'author': Related('author', USER_FIELDS),
+    'createdAt': ('created_at',),
+    'updatedAt': ('updated_at',),
+    'isAuthor': ('author',),
+}
+
+
+def selected_fields(info, object_type, field_nodes):
+    """Field name -> FieldNodes selecting it on `object_type`, with fragments, aliases and @skip/@include applied."""
+    fields = {}
+    collected = collect_sub_fields(info.schema, info.fragments, info.variable_values, object_type, field_nodes)
+    for nodes in collected.values():
+        for node in nodes:
+            fields.setdefault(node.name.value, []).append(node)
+    return fields
+
+
+def selection_at(info, path):
+    """The object type and FieldNodes `path` (e.g. ('edges', 'node')) below the current field."""
+    object_type = get_named_type(info.return_type)
+    field_nodes = info.field_nodes
+    for name in path:
+        field_nodes = selected_fields(info, object_type, field_nodes).get(name, [])
+        object_type = get_named_type(object_type.fields[name].type)
+    return object_type, field_nodes
+
+
+def columns(info, object_type, field_nodes, fields, prefix=''):
+    """
+    (only, select_related) for one object's selection, or None when it
+    selects a field the map doesn't know.
+    """
+    only = set()
+    related = set()
+    for name, nodes in selected_fields(info, object_type, field_nodes).items():
+        if name.startswith('__'):
+            continue
+        spec = fields.get(name)
+        if spec is None:
+            return None
+        if isinstance(spec, Related):
+            lookup = f'{prefix}{spec.field}'
+            related.add(lookup)
+            nested_type = get_named_type(object_type.fields[name].type)
+            nested = columns(info, nested_type, nodes, spec.fields, f'{lookup}__')
+            if nested is None:
+                # Load the whole related row rather than defer its fields
+                only.add(lookup)
+            else:
+                only.update(nested[0] or {f'{lookup}__id'})
+                related.update(nested[1])
+        else:
+            only.update(f'{prefix}{column}' for column in spec)
+    return only, related
+
+
+def project(queryset, info, fields, path=(), keys=()):
+    """
+    `queryset` restricted to the columns the current field's selection at
+    `path` reads, plus `keys` (e.g. the pagination keyset, which cursors are
+    built from), with select_related for the relations it follows.
+    """
+    object_type, field_nodes = selection_at(info, path)
+    projection = columns(info, object_type, field_nodes, fields)
+    if projection is None:
+        # Every column, and every relation the map knows about
+        return queryset.select_related(*[spec.field for spec in fields.values() if isinstance(spec, Related)])
+    only, related = projection
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    return queryset.only('pk', *keys, *sorted(only))
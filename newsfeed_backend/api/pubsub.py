@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Defaults for settings.GRAPHQL_SUBSCRIPTIONS
+DEFAULT_BROKER = 'api.pubsub.InProcessBroker'
+DEFAULT_MAX_QUEUE_SIZE = 100
+
+# Channels the mutations publish to, one per subscription field
+POST_CREATED = 'postCreated'
+POST_UPDATED = 'postUpdated'
+POST_LIKE_COUNT_CHANGED = 'postLikeCountChanged'
+COMMENT_ADDED = 'commentAdded'
+
+
+def subscription_options():
+    return getattr(settings, 'GRAPHQL_SUBSCRIPTIONS', {})
+
+
+class Broker:
+    """
+    Pub/sub backend for GraphQL subscriptions.
+
+    Messages are small JSON-serializable dicts (ids and counts, never model
+    instances) so a broker can ship them between processes. Subclass this to
+    plug in Redis, Postgres LISTEN/NOTIFY or similar, and point
+    settings.GRAPHQL_SUBSCRIPTIONS['BROKER'] at the subclass.
+    """
+
+    def publish(self, channel, message):
+        """Deliver `message` to every current subscriber of `channel`. May be called from any thread."""
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """Return an async iterator over the messages published to `channel` from now on."""
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """
+    Delivers messages to subscribers in this process only, which is enough
+    when the mutations and the websockets are served by the same ASGI worker.
+    """
+
+    def __init__(self, max_queue_size=DEFAULT_MAX_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        # channel -> {(event loop, queue)} of live subscribers
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                # Mutations run in worker threads; queues belong to the event loop
+                loop.call_soon_threadsafe(self._deliver, queue, message)
+            except RuntimeError:
+                pass  # The loop has closed, the subscription is going away
+
+    def _deliver(self, queue, message):
+        # A client that can't keep up loses its oldest events rather than
+        # growing the queue without bound
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.max_queue_size))
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                options = subscription_options()
+                broker_class = import_string(options.get('BROKER', DEFAULT_BROKER))
+                _broker = broker_class(**options.get('OPTIONS', {}))
+    return _broker
+
+
+def publish(channel, **message):
+    # Only tell subscribers about changes that actually committed
+    transaction.on_commit(lambda: get_broker().publish(channel, message))
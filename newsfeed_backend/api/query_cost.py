@@ -0,0 +1,198 @@
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLList,
+    GraphQLObjectType,
+    InlineFragmentNode,
+    OperationType,
+    get_named_type,
+    get_nullable_type,
+)
+from graphql.execution.values import get_argument_values
+from graphql.utilities import get_operation_ast
+
+from .pagination import page_size
+
+# Defaults for settings.GRAPHQL_QUERY_COST
+DEFAULT_MAX_DEPTH = 10
+DEFAULT_ANONYMOUS_MAX_COST = 2000
+DEFAULT_AUTHENTICATED_MAX_COST = 5000
+
+# What one execution of a field costs. Fields returning objects or lists cost
+# 1 unless listed here; scalar fields are free unless listed here.
+DEFAULT_FIELD_COSTS = {
+    'Mutation.login': 20,  # full password hash
+    'Mutation.signup': 20,
+    'Query.homeFeed': 2,
+    'Query.searchPosts': 5,  # full-text match and ranking
+}
+
+# How many items an unpaginated list field is assumed to return. Fields with a
+# `first` argument are sized by it instead.
+DEFAULT_LIST_SIZES = {
+    'Query.allPosts': 500,
+    'Query.postComments': 50,
+    'Post.likes': 50,
+    'Post.comments': 50,
+    # Sized by `first` on the connection field itself
+    'PostConnection.edges': 1,
+    'CommentConnection.edges': 1,
+}
+DEFAULT_LIST_SIZE = 10
+
+
+def cost_options():
+    return getattr(settings, 'GRAPHQL_QUERY_COST', {})
+
+
+class QueryCostError(Exception):
+    def __init__(self, message, code, analysis):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.analysis = analysis
+
+    def formatted(self):
+        return {'message': self.message, 'extensions': {'code': self.code, 'cost': self.analysis.as_dict()}}
+
+
+class CostAnalysis:
+    def __init__(self, cost, depth, budget, max_depth):
+        self.cost = cost
+        self.depth = depth
+        self.budget = budget
+        self.max_depth = max_depth
+
+    def as_dict(self):
+        return {'requestedCost': self.cost, 'maximumCost': self.budget, 'depth': self.depth, 'maximumDepth': self.max_depth}
+
+
+class CostCalculator:
+    """
+    Static cost of an operation: the sum of field costs, where everything
+    below a list field is multiplied by the list's (assumed) size.
+    """
+
+    def __init__(self, schema, document, variables):
+        self.schema = schema
+        self.variables = variables or {}
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+        options = cost_options()
+        self.field_costs = {**DEFAULT_FIELD_COSTS, **options.get('FIELD_COSTS', {})}
+        self.list_sizes = {**DEFAULT_LIST_SIZES, **options.get('LIST_SIZES', {})}
+
+    def selection_cost(self, parent_type, selection_set, visited=frozenset()):
+        # Returns (cost, depth) of a selection set on `parent_type`
+        cost, depth = 0, 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_cost, field_depth = self.field_cost(parent_type, selection, visited)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                # Cyclic spreads are a validation error, don't recurse forever
+                if fragment is None or name in visited:
+                    continue
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value) or parent_type
+                field_cost, field_depth = self.selection_cost(fragment_type, fragment.selection_set, visited | {name})
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value) or parent_type
+                field_cost, field_depth = self.selection_cost(fragment_type, selection.selection_set, visited)
+            else:
+                continue
+            cost += field_cost
+            depth = max(depth, field_depth)
+        return cost, depth
+
+    def field_cost(self, parent_type, node, visited):
+        name = node.name.value
+        # Introspection is cheap and deep by design; leave it to the introspection setting
+        if name.startswith('__') or not isinstance(parent_type, GraphQLObjectType):
+            return 0, 0
+        field = parent_type.fields.get(name)
+        if field is None:
+            return 0, 0  # Unknown fields fail validation anyway
+
+        key = f'{parent_type.name}.{name}'
+        return_type = get_named_type(field.type)
+        is_object = isinstance(return_type, GraphQLObjectType)
+        cost = self.field_costs.get(key, 1 if is_object else 0)
+
+        if node.selection_set is None or not is_object:
+            return cost, 1
+
+        children_cost, children_depth = self.selection_cost(return_type, node.selection_set, visited)
+        return cost + self.multiplier(key, field, node) * children_cost, children_depth + 1
+
+    def multiplier(self, key, field, node):
+        if 'first' in field.args:
+            try:
+                args = get_argument_values(field, node, self.variables)
+                return page_size(args.get('first'))
+            except Exception:
+                return page_size(None)
+        if isinstance(get_nullable_type(field.type), GraphQLList):
+            return self.list_sizes.get(key, DEFAULT_LIST_SIZE)
+        return 1
+
+
+def get_budget(user, ip_address):
+    """Maximum cost per operation for this client: per-user, then per-IP, then the default."""
+    options = cost_options()
+    if user is not None:
+        budgets = options.get('USER_BUDGETS', {})
+        for key in (user.username, user.id, str(user.id)):
+            if key in budgets:
+                return budgets[key]
+    ip_budgets = options.get('IP_BUDGETS', {})
+    if ip_address in ip_budgets:
+        return ip_budgets[ip_address]
+    if user is not None:
+        return options.get('AUTHENTICATED_MAX_COST', DEFAULT_AUTHENTICATED_MAX_COST)
+    return options.get('ANONYMOUS_MAX_COST', DEFAULT_ANONYMOUS_MAX_COST)
+
+
+def analyze(schema, document, data, user=None, ip_address=None):
+    """
+    Compute the cost and depth of the requested operation and raise
+    QueryCostError if it is over this client's budget. Returns None when
+    there is no operation to analyze (graphql_sync reports that).
+    """
+    operation = get_operation_ast(document, data.get('operationName'))
+    if operation is None:
+        return None
+
+    root_type = {
+        OperationType.QUERY: schema.query_type,
+        OperationType.MUTATION: schema.mutation_type,
+        OperationType.SUBSCRIPTION: schema.subscription_type,
+    }.get(operation.operation)
+    if root_type is None:
+        return None
+
+    calculator = CostCalculator(schema, document, data.get('variables'))
+    cost, depth = calculator.selection_cost(root_type, operation.selection_set)
+
+    analysis = CostAnalysis(
+        cost=cost,
+        depth=depth,
+        budget=get_budget(user, ip_address),
+        max_depth=cost_options().get('MAX_DEPTH', DEFAULT_MAX_DEPTH),
+    )
+    if depth > analysis.max_depth:
+        raise QueryCostError(
+            f'Query depth {depth} exceeds the maximum depth of {analysis.max_depth}', 'QUERY_TOO_DEEP', analysis
+        )
+    if cost > analysis.budget:
+        raise QueryCostError(
+            f'Query cost {cost} exceeds the maximum cost of {analysis.budget}', 'QUERY_TOO_COMPLEX', analysis
+        )
+    return analysis
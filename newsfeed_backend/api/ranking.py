@@ -0,0 +1,46 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import F, Value
+from django.db.models.functions import Log
+
+# Hotness, for topPosts:
+#
+#     hot_score = log10(1 + likes + COMMENT_WEIGHT * comments) + (created_at - EPOCH) / DECAY_SECONDS
+#
+# A post DECAY_SECONDS newer needs ten times less engagement to rank the
+# same, so older posts decay relative to newer ones without scores ever being
+# recomputed over time. Only the engagement term changes afterwards, and the
+# counter updates adjust it in the same UPDATE that changes the counters.
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+DECAY_SECONDS = 45000
+COMMENT_WEIGHT = 2
+
+# topPosts(window:) values and how far back each one reaches
+WINDOWS = {
+    'DAY': timedelta(days=1),
+    'WEEK': timedelta(days=7),
+    'MONTH': timedelta(days=30),
+    'YEAR': timedelta(days=365),
+    'ALL': None,
+}
+
+
+def engagement(likes, comments):
+    return 1 + likes + COMMENT_WEIGHT * comments
+
+
+def hot_score(likes, comments, created_at):
+    return math.log10(engagement(likes, comments)) + (created_at - EPOCH).total_seconds() / DECAY_SECONDS
+
+
+def hot_score_update(likes_delta=0, comments_delta=0):
+    """
+    Expression for the new hot_score of a row whose counters change by the
+    given deltas. Counter references on the right-hand side of an UPDATE see
+    the old values, so this swaps the old engagement term for the new one.
+    """
+    likes, comments = F('likes_count'), F('comments_count')
+    old = engagement(likes, comments)
+    new = engagement(likes + likes_delta, comments + comments_delta)
+    return F('hot_score') + Log(Value(10.0), new) - Log(Value(10.0), old)
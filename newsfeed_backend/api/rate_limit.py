@@ -0,0 +1,237 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from graphql import FieldNode, FragmentDefinitionNode, FragmentSpreadNode, InlineFragmentNode, OperationType
+from graphql.utilities import get_operation_ast
+
+# Defaults for settings.GRAPHQL_RATE_LIMIT
+DEFAULT_BACKEND = 'api.rate_limit.InMemoryBackend'
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_CACHE_ALIAS = 'default'
+
+KEY_PREFIX = 'rate-limit'
+
+# Token buckets per client (user, or IP address when signed out) and root
+# field: (capacity, period) lets a client burst `capacity` operations and
+# then run one every period / capacity seconds. Root fields not listed here
+# are not limited.
+DEFAULT_RULES = {
+    'Mutation.login': (10, 60),  # full password hash
+    'Mutation.signup': (5, 60),
+    'Mutation.createPost': (10, 60),
+    'Mutation.createComment': (20, 60),
+    'Mutation.likePost': (60, 60),
+    'Mutation.unlikePost': (60, 60),
+    'Mutation.setLikes': (10, 60),
+    'Query.searchPosts': (60, 60),  # full-text match and ranking
+}
+
+
+def rate_limit_options():
+    return getattr(settings, 'GRAPHQL_RATE_LIMIT', {})
+
+
+def is_enabled():
+    return rate_limit_options().get('ENABLED', True)
+
+
+def get_rules():
+    # A rule set to None in settings turns the default off
+    rules = {**DEFAULT_RULES, **rate_limit_options().get('RULES', {})}
+    return {field: rule for field, rule in rules.items() if rule is not None}
+
+
+class RateLimitError(Exception):
+    def __init__(self, field, retry_after):
+        self.field = field
+        # Whole seconds, as Retry-After wants them
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.message = f'Too many {field.split(".")[-1]} requests, retry in {self.retry_after} seconds'
+        super().__init__(self.message)
+
+    def formatted(self):
+        return {
+            'message': self.message,
+            'extensions': {'code': 'RATE_LIMITED', 'field': self.field, 'retryAfter': self.retry_after},
+        }
+
+
+def refill(level, updated_at, now, capacity, period):
+    # Tokens in a bucket that held `level` at `updated_at`
+    return min(capacity, level + (now - updated_at) * capacity / period)
+
+
+def take_from(level, tokens, capacity, period):
+    """(new level, seconds until `tokens` are available or 0 if they were taken)."""
+    if level >= tokens:
+        return level - tokens, 0
+    if tokens > capacity:
+        # Never fits; make the client wait out a whole period rather than spin
+        return level, period
+    return level, (tokens - level) * period / capacity
+
+
+class Backend:
+    """
+    Storage for token buckets. take() must refill the bucket, then either
+    remove `tokens` from it or leave it untouched and say how long to wait.
+    """
+
+    def take(self, key, tokens, capacity, period):
+        """Seconds to wait before retrying, or 0 if the tokens were taken."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class InMemoryBackend(Backend):
+    """
+    Buckets in this process's memory: exact and cheap, but each worker
+    process enforces the limits on its own share of the traffic.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key -> [level, updated_at], least recently used first
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, tokens, capacity, period):
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            level = capacity if bucket is None else refill(*bucket, now, capacity, period)
+            level, retry_after = take_from(level, tokens, capacity, period)
+            self._buckets[key] = [level, now]
+            self._buckets.move_to_end(key)
+            # Forgetting a bucket only refills it early
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class CacheBackend(Backend):
+    """
+    Buckets in a Django cache shared by every worker, e.g. Redis or
+    Memcached. The read and the write aren't atomic, so requests from one
+    client racing on different workers can each take the same token; that
+    lets a burst through a little early but never lets a steady flood past.
+    """
+
+    def __init__(self, cache_alias=DEFAULT_CACHE_ALIAS):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def take(self, key, tokens, capacity, period):
+        now = time.time()
+        cache_key = f'{KEY_PREFIX}:{key}'
+        bucket = self.cache.get(cache_key)
+        level = capacity if bucket is None else refill(*bucket, now, capacity, period)
+        level, retry_after = take_from(level, tokens, capacity, period)
+        if not retry_after:
+            # A bucket left alone for a period is full again, same as a missing one
+            self.cache.set(cache_key, (level, now), timeout=math.ceil(period))
+        return retry_after
+
+    def clear(self):
+        # Entries expire by themselves; nothing to track per key
+        pass
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend():
+    options = rate_limit_options()
+    path = options.get('BACKEND', DEFAULT_BACKEND)
+    backend = _backends.get(path)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(path)
+            if backend is None:
+                backend = _backends[path] = import_string(path)(**options.get('OPTIONS', {}))
+    return backend
+
+
+def reset():
+    # Empty every bucket, e.g. between tests
+    for backend in list(_backends.values()):
+        backend.clear()
+
+
+def root_field_counts(schema, document, operation):
+    """'Type.field' -> how many times the operation selects it at the root (aliases count separately)."""
+    root_type = {
+        OperationType.QUERY: schema.query_type,
+        OperationType.MUTATION: schema.mutation_type,
+        OperationType.SUBSCRIPTION: schema.subscription_type,
+    }.get(operation.operation)
+    if root_type is None:
+        return {}
+    fragments = {definition.name.value: definition for definition in document.definitions
+                 if isinstance(definition, FragmentDefinitionNode)}
+    counts = {}
+    pending = [operation.selection_set]
+    visited = set()
+    while pending:
+        for selection in pending.pop().selections:
+            if isinstance(selection, FieldNode):
+                key = f'{root_type.name}.{selection.name.value}'
+                counts[key] = counts.get(key, 0) + 1
+            elif isinstance(selection, InlineFragmentNode):
+                pending.append(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                # Cyclic spreads are a validation error, don't loop forever
+                if name in fragments and name not in visited:
+                    visited.add(name)
+                    pending.append(fragments[name].selection_set)
+    return counts
+
+
+def client_key(user, ip_address):
+    # Signed-in clients get their own buckets wherever they connect from
+    if user is not None:
+        return f'user:{user.id}'
+    return f'ip:{ip_address}'
+
+
+def check(schema, document, data, user=None, ip_address=None):
+    """
+    Take a token per rate-limited root field selection of the requested
+    operation from this client's buckets, and raise RateLimitError if a
+    bucket is empty. Fields checked before the empty one keep their tokens
+    spent.
+    """
+    if not is_enabled():
+        return
+    operation = get_operation_ast(document, data.get('operationName'))
+    if operation is None:
+        return
+    rules = get_rules()
+    backend = get_backend()
+    client = client_key(user, ip_address)
+    for field, count in sorted(root_field_counts(schema, document, operation).items()):
+        if field not in rules:
+            continue
+        capacity, period = rules[field]
+        retry_after = backend.take(f'{client}:{field}', count, capacity, period)
+        if retry_after:
+            raise RateLimitError(field, retry_after)
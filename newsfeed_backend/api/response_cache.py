@@ -0,0 +1,182 @@
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from graphql import FieldNode, FragmentDefinitionNode, FragmentSpreadNode, OperationType, print_ast
+from graphql.execution.values import get_argument_values
+from graphql.utilities import get_operation_ast
+
+# Defaults for settings.GRAPHQL_RESPONSE_CACHE
+DEFAULT_CACHE_ALIAS = 'default'
+DEFAULT_TIMEOUT = 60
+
+KEY_PREFIX = 'graphql-response'
+
+# Root query fields whose results are the same for every viewer, mapped to the
+# invalidation tags a result depends on (given the field's arguments)
+CACHEABLE_ROOT_FIELDS = {
+    'allPosts': lambda args: ['posts'],
+    'postsConnection': lambda args: ['posts'],
+    # Every post and comment mutation bumps 'posts', which covers the search index
+    'searchPosts': lambda args: ['posts'],
+    'topPosts': lambda args: ['posts'],
+    'post': lambda args: [post_tag(args['id'])],
+    'postComments': lambda args: [post_tag(args['postId'])],
+    '__typename': lambda args: [],
+}
+
+# Fields whose value depends on who is asking. Authenticated requests that
+# select any of these are never cached.
+VIEWER_FIELDS = {'isAuthor', 'isLiked', 'email'}
+
+
+def post_tag(post_id):
+    return f'post:{post_id}'
+
+
+def cache_options():
+    return getattr(settings, 'GRAPHQL_RESPONSE_CACHE', {})
+
+
+def is_enabled():
+    return cache_options().get('ENABLED', True)
+
+
+def get_cache():
+    return caches[cache_options().get('CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+
+
+def is_shared_cache():
+    # Local memory is per process: a mutation's invalidate() only reaches the
+    # worker that ran it, and the others serve their entries until TIMEOUT
+    return not isinstance(get_cache(), LocMemCache)
+
+
+def selects_viewer_fields(selection_set, document):
+    fragments = {definition.name.value: definition for definition in document.definitions
+                 if isinstance(definition, FragmentDefinitionNode)}
+    pending = [selection_set]
+    while pending:
+        current = pending.pop()
+        if current is None:
+            continue
+        for selection in current.selections:
+            if isinstance(selection, FieldNode):
+                if selection.name.value in VIEWER_FIELDS:
+                    return True
+                pending.append(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = fragments.get(selection.name.value)
+                pending.append(fragment.selection_set if fragment else None)
+            else:
+                pending.append(selection.selection_set)
+    return False
+
+
+class CachePlan:
+    """Where a cacheable operation's result lives and which tags invalidate it."""
+
+    def __init__(self, key, tags):
+        self.key = key
+        self.tags = tags
+        # Tag versions as of the lookup, i.e. before the operation executed
+        self.versions = None
+
+
+def plan_for(schema, document, data, authenticated, normalized_query=None):
+    """
+    Return a CachePlan if this operation's result can be shared, else None.
+
+    Only queries whose root fields are all in CACHEABLE_ROOT_FIELDS qualify.
+    Anonymous results are shared between all anonymous viewers; authenticated
+    ones only when nothing viewer-specific is selected.
+    """
+    if not is_enabled():
+        return None
+
+    operation = get_operation_ast(document, data.get('operationName'))
+    if operation is None or operation.operation != OperationType.QUERY:
+        return None
+    if authenticated and selects_viewer_fields(operation.selection_set, document):
+        return None
+
+    variables = data.get('variables') or {}
+    tags = operation_tags(schema, operation, variables)
+    if tags is None:
+        return None
+
+    # The printed document ignores whitespace, comments and formatting differences
+    raw_key = json.dumps(
+        [normalized_query or print_ast(document), data.get('operationName'), variables, 'authenticated' if authenticated else 'anonymous'],
+        sort_keys=True,
+        default=str,
+    )
+    key = f'{KEY_PREFIX}:{hashlib.sha256(raw_key.encode()).hexdigest()}'
+    return CachePlan(key, tags)
+
+
+def operation_tags(schema, operation, variables):
+    """
+    The sorted invalidation tags a query operation's result depends on, or
+    None if it selects a root field that isn't in CACHEABLE_ROOT_FIELDS.
+    """
+    tags = set()
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode) or selection.name.value not in CACHEABLE_ROOT_FIELDS:
+            return None
+        name = selection.name.value
+        args = {}
+        if name in schema.query_type.fields:
+            try:
+                args = get_argument_values(schema.query_type.fields[name], selection, variables)
+            except Exception:
+                # Let execution report bad arguments
+                return None
+        tags.update(CACHEABLE_ROOT_FIELDS[name](args))
+    return sorted(tags)
+
+
+def tag_key(tag):
+    return f'{KEY_PREFIX}:tag:{tag}'
+
+
+def get_tag_versions(tags):
+    """
+    Current version token of each tag. Missing tokens (never set, or evicted)
+    are created fresh, so an entry stored against an old token can never match.
+    """
+    cache = get_cache()
+    keys = {tag_key(tag): tag for tag in tags}
+    versions = cache.get_many(list(keys))
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def lookup(plan):
+    plan.versions = get_tag_versions(plan.tags)
+    entry = get_cache().get(plan.key)
+    if entry is None or entry['versions'] != plan.versions:
+        return None
+    return entry['result']
+
+
+def store(plan, result):
+    # Stored against the versions read before execution, so a mutation that
+    # lands while the query runs leaves this entry already stale
+    entry = {'result': result, 'versions': plan.versions}
+    get_cache().set(plan.key, entry, cache_options().get('TIMEOUT', DEFAULT_TIMEOUT))
+
+
+def invalidate(*tags):
+    get_cache().set_many({tag_key(tag): uuid.uuid4().hex for tag in tags}, timeout=None)
+
+
+def invalidate_posts(*post_ids):
+    # Every post change affects the post lists as well as the post itself
+    invalidate('posts', *[post_tag(post_id) for post_id in post_ids])
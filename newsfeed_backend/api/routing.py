@@ -0,0 +1,101 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from graphql.utilities import get_operation_ast
+
+# Defaults for settings.DATABASE_REPLICAS
+DEFAULT_READ_YOUR_WRITES_SECONDS = 5
+DEFAULT_CACHE_ALIAS = 'default'
+
+# The database the running GraphQL operation reads from. Only the views set it,
+# around execution; everything else (auth, admin, commands, subscriptions)
+# keeps Django's default routing and reads from the primary. Context variables
+# follow the async view's tasks and its sync_to_async threads.
+current_database = ContextVar('graphql_database', default=None)
+
+
+def replica_options():
+    return getattr(settings, 'DATABASE_REPLICAS', {})
+
+
+def replica_aliases():
+    return list(replica_options().get('ALIASES', ()))
+
+
+def read_your_writes_seconds():
+    return replica_options().get('READ_YOUR_WRITES_SECONDS', DEFAULT_READ_YOUR_WRITES_SECONDS)
+
+
+def recent_write_key(user):
+    return f'db-recent-write:{user.id}'
+
+
+def get_cache():
+    return caches[replica_options().get('CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+
+
+def operation_type(document, operation_name=None):
+    # 'query', 'mutation' or 'subscription'; None if the document doesn't say
+    operation = get_operation_ast(document, operation_name)
+    return operation.operation.value if operation is not None else None
+
+
+def record_write(user):
+    """
+    Pin `user`'s reads to the primary for the read-your-writes window, so a
+    query right after their mutation sees it even if the replicas lag. The
+    marker lives in the shared cache so every worker honours it.
+    """
+    seconds = read_your_writes_seconds()
+    if user is not None and seconds:
+        get_cache().set(recent_write_key(user), 1, timeout=seconds)
+
+
+def choose_database(operation, user):
+    """The alias an operation should read from: a replica for queries, else the primary."""
+    aliases = replica_aliases()
+    if not aliases or operation != 'query':
+        return DEFAULT_DB_ALIAS
+    if user is not None and read_your_writes_seconds() and get_cache().get(recent_write_key(user)):
+        return DEFAULT_DB_ALIAS
+    return random.choice(aliases)
+
+
+@contextmanager
+def use_database(alias):
+    token = current_database.set(alias)
+    try:
+        yield
+    finally:
+        current_database.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the database chosen for the current GraphQL operation and
+    every write to the primary. Replicas are copies of the primary, so they
+    are never migrated directly.
+    """
+
+    def db_for_read(self, model, **hints):
+        # None falls back to Django's default: the instance's database, else the primary
+        return current_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are still saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
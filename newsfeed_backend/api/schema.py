@@ -1,13 +1,30 @@
 from django.contrib.auth.models import User
 from ariadne import QueryType, MutationType, ObjectType, make_executable_schema, gql, ScalarType
 from .models import Post, Comment, Like
+from .pagination import DEFAULT_ORDERING, paginate
+from .projection import COMMENT_FIELDS, POST_FIELDS, project
+from .loaders import Loaders
+from .auth import get_user_from_token
+from .feed import fan_out_post, follow, home_feed, unfollow
+from .response_cache import invalidate_posts
+from .pubsub import COMMENT_ADDED, POST_CREATED, POST_LIKE_COUNT_CHANGED, POST_UPDATED, publish
+from .likes import MAX_SET_LIKES, set_like
+from .ranking import WINDOWS, hot_score_update
+from .search import search_posts
 import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from graphql import GraphQLError
 from django.contrib.auth import authenticate, login, get_user_model
 
 # GraphQL Type Definitions
 type_defs = gql("""
+    scalar DateTime
+
     type User {
         id: ID!
         username: String!
@@ -25,39 +42,88 @@ type_defs = gql("""
         id: ID!
         content: String!
         author: User!
-        createdAt: String!
-        updatedAt: String!
+        createdAt: DateTime!
+        updatedAt: DateTime!
         isAuthor: Boolean!
     }
 
     type Like {
         id: ID!
         user: User!
-        createdAt: String!
+        createdAt: DateTime!
     }
 
     type Post {
         id: ID!
         title: String!
         content: String!
+        contentPreview: String!
+        contentTruncated: Boolean!
         author: User!
-        createdAt: String!
-        updatedAt: String!
+        createdAt: DateTime!
+        updatedAt: DateTime!
         isAuthor: Boolean!
         likesCount: Int!
         commentsCount: Int!
         likes: [Like!]!
         comments: [Comment!]!
+        commentsConnection(first: Int, after: String): CommentConnection!
         isLiked: Boolean!
     }
 
+    type PageInfo {
+        hasNextPage: Boolean!
+        hasPreviousPage: Boolean!
+        startCursor: String
+        endCursor: String
+    }
+
+    type PostEdge {
+        cursor: String!
+        node: Post!
+    }
+
+    enum TopPostsWindow {
+        DAY
+        WEEK
+        MONTH
+        YEAR
+        ALL
+    }
+
+    type PostConnection {
+        edges: [PostEdge!]!
+        pageInfo: PageInfo!
+    }
+
+    type CommentEdge {
+        cursor: String!
+        node: Comment!
+    }
+
+    type CommentConnection {
+        edges: [CommentEdge!]!
+        pageInfo: PageInfo!
+    }
+
     type Query {
         allPosts: [Post!]!
+        postsConnection(first: Int, after: String): PostConnection!
+        homeFeed(first: Int, after: String): PostConnection
+        searchPosts(query: String!, first: Int, after: String): PostConnection!
+        topPosts(window: TopPostsWindow = WEEK, first: Int, after: String): PostConnection!
         post(id: ID!): Post
         me: User
         postComments(postId: ID!): [Comment!]!
     }
 
+    type Subscription {
+        postCreated: Post!
+        postUpdated: Post!
+        postLikeCountChanged(postId: ID): Post!
+        commentAdded(postId: ID): Comment!
+    }
+
     input CreatePostInput {
         title: String!
         content: String!
@@ -81,6 +147,11 @@ type_defs = gql("""
         password: String!
     }
 
+    input SetLikeInput {
+        postId: ID!
+        liked: Boolean!
+    }
+
     input CreateCommentInput {
         postId: ID!
         content: String!
@@ -102,6 +173,10 @@ type_defs = gql("""
         
         likePost(postId: ID!): Post
         unlikePost(postId: ID!): Post
+        setLikes(input: [SetLikeInput!]!): [Post]
+        
+        followUser(userId: ID!): User
+        unfollowUser(userId: ID!): User
         
         createComment(input: CreateCommentInput!): Comment
         updateComment(id: ID!, input: UpdateCommentInput!): Comment
@@ -114,12 +189,53 @@ query = QueryType()
 
 @query.field("allPosts")
 def resolve_all_posts(_, info):
-    return Post.objects.select_related('author').all()
+    # Only the columns the query selects; a feed without `content` skips reading it
+    posts = list(project(Post.objects.all(), info, POST_FIELDS))
+    # Let the nested Post fields load in one batch for the whole list
+    return get_loaders(info).expect_posts(posts)
+
+@query.field("postsConnection")
+def resolve_posts_connection(_, info, first=None, after=None):
+    # Newest posts first, paginated with an opaque (created_at, id) cursor
+    posts = project(Post.objects.all(), info, POST_FIELDS, path=('edges', 'node'), keys=DEFAULT_ORDERING)
+    connection = paginate(posts, first=first, after=after)
+    get_loaders(info).expect_posts([edge['node'] for edge in connection['edges']])
+    return connection
+
+@query.field("homeFeed")
+def resolve_home_feed(_, info, first=None, after=None):
+    # Get the user from the context
+    user = get_user_from_context(info.context)
+    
+    # Only authenticated users have a home feed
+    if not user:
+        return None
+    
+    connection = home_feed(user, first=first, after=after)
+    get_loaders(info).expect_posts([edge['node'] for edge in connection['edges']])
+    return connection
+
+@query.field("searchPosts")
+def resolve_search_posts(_, info, query, first=None, after=None):
+    # Posts whose title, content or comments match, best match first
+    connection = search_posts(query, first=first, after=after)
+    get_loaders(info).expect_posts([edge['node'] for edge in connection['edges']])
+    return connection
+
+@query.field("topPosts")
+def resolve_top_posts(_, info, window='WEEK', first=None, after=None):
+    # Hottest posts created within the window, read straight off the hot_score index
+    posts = project(Post.objects.all(), info, POST_FIELDS, path=('edges', 'node'), keys=('hot_score', 'id'))
+    if WINDOWS[window] is not None:
+        posts = posts.filter(created_at__gte=timezone.now() - WINDOWS[window])
+    connection = paginate(posts, first=first, after=after, keys=('hot_score', 'id'))
+    get_loaders(info).expect_posts([edge['node'] for edge in connection['edges']])
+    return connection
 
 @query.field("post")
 def resolve_post(_, info, id):
     try:
-        return Post.objects.select_related('author').get(pk=id)
+        return project(Post.objects.all(), info, POST_FIELDS).get(pk=id)
     except Post.DoesNotExist:
         return None
         
@@ -145,7 +261,8 @@ def resolve_me(_, info):
 @query.field("postComments")
 def resolve_post_comments(_, info, postId):
     try:
-        return Comment.objects.filter(post_id=postId).select_related('author').order_by('-created_at')
+        comments = project(Comment.objects.filter(post_id=postId), info, COMMENT_FIELDS)
+        return comments.order_by('-created_at')
     except Exception as e:
         print(f"Error getting comments: {e}")
         return []
@@ -168,6 +285,11 @@ def resolve_create_post(_, info, input):
             content=input['content'],
             author=user
         )
+        
+        # Materialize the post into the author's and their followers' home timelines
+        fan_out_post(post)
+        invalidate_posts(post.id)
+        publish(POST_CREATED, postId=post.id)
         return post
     except Exception as e:
         # Handle other potential errors
@@ -195,6 +317,8 @@ def resolve_update_post(_, info, id, input):
         if input.get('content'):
             post.content = input['content']
         post.save()
+        invalidate_posts(post.id)
+        publish(POST_UPDATED, postId=post.id)
         return post
     except Post.DoesNotExist:
         return None
@@ -217,7 +341,9 @@ def resolve_delete_post(_, info, id):
         if post.author != user:
             return None  # User is not authorized to delete this post
             
+        post_id = post.id
         post.delete()
+        invalidate_posts(post_id)
         return post # Return the deleted post for confirmation
     except Post.DoesNotExist:
         return None
@@ -252,6 +378,29 @@ def get_user_from_context(context):
     
     return None
 
+# Helper function to atomically adjust one of the denormalized Post counters
+def adjust_post_counter(post_id, field, delta):
+    queryset = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        # Never push a drifted counter below zero; reconcile_counters repairs it
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    # The hot score moves with the counter in the same statement
+    deltas = {'likes_delta': delta} if field == 'likes_count' else {'comments_delta': delta}
+    queryset.update(**{field: F(field) + delta}, hot_score=hot_score_update(**deltas))
+
+# Helper function to get the per-request DataLoaders from context
+def get_loaders(info):
+    context = info.context
+    loaders = context.get('loaders') if isinstance(context, dict) else getattr(context, 'loaders', None)
+    
+    # Fall back to fresh loaders when the schema is executed without our view
+    if loaders is None:
+        loaders = Loaders(get_user_from_context(context))
+        if isinstance(context, dict):
+            context['loaders'] = loaders
+    
+    return loaders
+
 # Authentication Mutation Resolvers
 @mutation.field("signup")
 def resolve_signup(_, info, input):
@@ -305,15 +454,8 @@ def resolve_login(_, info, input):
     
 @mutation.field("verifyToken")
 def resolve_verify_token(_, info, token):
-    try:
-        # Verify the token
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        # Check if user exists
-        user_id = payload.get('user_id')
-        user = User.objects.filter(id=user_id).first()
-        return user is not None
-    except jwt.PyJWTError:
-        return False
+    # Verify the token and check the user exists (served from the token cache when possible)
+    return get_user_from_token(token) is not None
         
 @mutation.field("refreshToken")
 def resolve_refresh_token(_, info, token):
@@ -332,6 +474,35 @@ def resolve_refresh_token(_, info, token):
     except jwt.PyJWTError:
         return None
         
+def apply_likes(info, user, changes):
+    """
+    Set the viewer's like state for each (post_id, liked) pair and return the
+    posts (None for missing ones), with the per-request loaders updated so
+    likesCount/isLiked resolve without further queries.
+    """
+    loaders = get_loaders(info)
+    posts = []
+    changed_ids = []
+    for post_id, liked in changes:
+        try:
+            post, changed = set_like(user, int(post_id), liked)
+        except ValueError:
+            post, changed = None, False
+        posts.append(post)
+        if post is None:
+            continue
+        loaders.clear_post(post.id)
+        if liked:
+            loaders.liked_post_ids.add(post.id)
+        else:
+            loaders.liked_post_ids.discard(post.id)
+        if changed:
+            changed_ids.append(post.id)
+            publish(POST_LIKE_COUNT_CHANGED, postId=post.id, likesCount=post.likes_count)
+    if changed_ids:
+        invalidate_posts(*changed_ids)
+    return posts
+
 @mutation.field("likePost")
 def resolve_like_post(_, info, postId):
     try:
@@ -341,24 +512,50 @@ def resolve_like_post(_, info, postId):
         # Make sure the user is authenticated
         if not user:
             return None  # User not authenticated
-            
-        post = Post.objects.get(pk=postId)
-        
-        # Check if the user already liked this post
-        existing_like = Like.objects.filter(post=post, user=user).first()
-        if not existing_like:
-            # Create the like
-            Like.objects.create(post=post, user=user)
         
-        return post
-    except Post.DoesNotExist:
-        return None
+        # Insert-if-missing and counter update, no check-then-act race
+        return apply_likes(info, user, [(postId, True)])[0]
     except Exception as e:
         print(f"Error liking post: {e}")
         return None
         
 @mutation.field("unlikePost")
 def resolve_unlike_post(_, info, postId):
+    try:
+        # Get the user from the context
+        user = get_user_from_context(info.context)
+        
+        # Make sure the user is authenticated
+        if not user:
+            return None  # User not authenticated
+        
+        return apply_likes(info, user, [(postId, False)])[0]
+    except Exception as e:
+        print(f"Error unliking post: {e}")
+        return None
+
+@mutation.field("setLikes")
+def resolve_set_likes(_, info, input):
+    # Get the user from the context
+    user = get_user_from_context(info.context)
+    
+    # Make sure the user is authenticated
+    if not user:
+        return None  # User not authenticated
+    
+    if len(input) > MAX_SET_LIKES:
+        raise GraphQLError(f"setLikes accepts at most {MAX_SET_LIKES} changes")
+    
+    # Clients replaying offline likes may send a post more than once; the last state wins
+    changes = {}
+    for change in input:
+        changes.pop(change['postId'], None)
+        changes[change['postId']] = change['liked']
+    posts = dict(zip(changes, apply_likes(info, user, changes.items())))
+    return [posts[change['postId']] for change in input]
+
+@mutation.field("followUser")
+def resolve_follow_user(_, info, userId):
     try:
         # Get the user from the context
         user = get_user_from_context(info.context)
@@ -367,16 +564,37 @@ def resolve_unlike_post(_, info, postId):
         if not user:
             return None  # User not authenticated
             
-        post = Post.objects.get(pk=postId)
+        followee = User.objects.get(pk=userId)
         
-        # Find and delete the like if it exists
-        Like.objects.filter(post=post, user=user).delete()
+        # Users can't follow themselves
+        if followee.id == user.id:
+            return None
+            
+        follow(user, followee)
+        return followee
+    except User.DoesNotExist:
+        return None
+    except Exception as e:
+        print(f"Error following user: {e}")
+        return None
+
+@mutation.field("unfollowUser")
+def resolve_unfollow_user(_, info, userId):
+    try:
+        # Get the user from the context
+        user = get_user_from_context(info.context)
         
-        return post
-    except Post.DoesNotExist:
+        # Make sure the user is authenticated
+        if not user:
+            return None  # User not authenticated
+            
+        followee = User.objects.get(pk=userId)
+        unfollow(user, followee)
+        return followee
+    except User.DoesNotExist:
         return None
     except Exception as e:
-        print(f"Error unliking post: {e}")
+        print(f"Error unfollowing user: {e}")
         return None
 
 @mutation.field("createComment")
@@ -397,12 +615,17 @@ def resolve_create_comment(_, info, input):
             
         post = Post.objects.get(pk=post_id)
         
-        comment = Comment.objects.create(
-            post=post,
-            author=user,
-            content=content
-        )
-        
+        with transaction.atomic():
+            comment = Comment.objects.create(
+                post=post,
+                author=user,
+                content=content
+            )
+            adjust_post_counter(post.id, 'comments_count', 1)
+        
+        get_loaders(info).clear_post(post.id)
+        invalidate_posts(post.id)
+        publish(COMMENT_ADDED, postId=post.id, commentId=comment.id)
         return comment
     except Post.DoesNotExist:
         return None
@@ -429,6 +652,7 @@ def resolve_update_comment(_, info, id, input):
         comment.content = input.get('content')
         comment.save()
         
+        invalidate_posts(comment.post_id)
         return comment
     except Comment.DoesNotExist:
         return None
@@ -452,7 +676,11 @@ def resolve_delete_comment(_, info, id):
         if comment.author != user:
             return None  # User is not authorized to delete this comment
             
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
+            adjust_post_counter(comment.post_id, 'comments_count', -1)
+        get_loaders(info).clear_post(comment.post_id)
+        invalidate_posts(comment.post_id)
         return comment  # Return the deleted comment for confirmation
     except Comment.DoesNotExist:
         return None
@@ -465,16 +693,18 @@ post_type = ObjectType("Post")
 
 @post_type.field("author")
 def resolve_post_author(obj, info):
-    # obj is the Post instance
-    return obj.author
+    # obj is the Post instance; use the select_related author when it was loaded
+    if Post.author.is_cached(obj):
+        return obj.author
+    return get_loaders(info).users.load(obj.author_id)
 
-@post_type.field("createdAt")
-def resolve_post_created_at(obj, info):
-    return obj.created_at.isoformat()
+# Plain attributes, serialized by the DateTime scalar
+post_type.set_alias("createdAt", "created_at")
+post_type.set_alias("updatedAt", "updated_at")
 
-@post_type.field("updatedAt")
-def resolve_post_updated_at(obj, info):
-    return obj.updated_at.isoformat()
+# The stored excerpt, so feeds don't have to load the full content
+post_type.set_alias("contentPreview", "excerpt")
+post_type.set_alias("contentTruncated", "excerpt_truncated")
 
 @post_type.field("isAuthor")
 def resolve_post_is_author(obj, info):
@@ -483,29 +713,35 @@ def resolve_post_is_author(obj, info):
     
     # If we have an authenticated user, check if they're the author
     if user:
-        return obj.author.id == user.id
+        return obj.author_id == user.id
     
     return False
 
 @post_type.field("likesCount")
 def resolve_post_likes_count(obj, info):
-    # Use the cached property from the model to get the likes count
+    # Denormalized counter column, no aggregation needed
     return obj.likes_count
 
 @post_type.field("commentsCount")
 def resolve_post_comments_count(obj, info):
-    # Use the cached property from the model to get the comments count
+    # Denormalized counter column, no aggregation needed
     return obj.comments_count
     
 @post_type.field("likes")
 def resolve_post_likes(obj, info):
     # Return all likes for this post
-    return obj.likes.select_related('user').all()
+    return get_loaders(info).likes.load(obj.id)
 
 @post_type.field("comments")
 def resolve_post_comments(obj, info):
     # Return all comments for this post, sorted by creation time (newest first)
-    return obj.comments.select_related('author').order_by('-created_at')
+    return get_loaders(info).comments.load(obj.id)
+
+@post_type.field("commentsConnection")
+def resolve_post_comments_connection(obj, info, first=None, after=None):
+    # Same ordering as `comments`, but paginated with an opaque cursor
+    comments = project(obj.comments.all(), info, COMMENT_FIELDS, path=('edges', 'node'), keys=DEFAULT_ORDERING)
+    return paginate(comments, first=first, after=after)
     
 @post_type.field("isLiked")
 def resolve_post_is_liked(obj, info):
@@ -515,7 +751,8 @@ def resolve_post_is_liked(obj, info):
     if not user:
         return False
         
-    return obj.likes.filter(user=user).exists()
+    # O(1) lookup in the viewer's liked set, fetched once for the whole page
+    return get_loaders(info).liked_post_ids.contains(obj.id)
     
 # User Type (can be expanded if needed)
 user_type = ObjectType("User")
@@ -542,15 +779,12 @@ comment_type = ObjectType("Comment")
 @comment_type.field("author")
 def resolve_comment_author(obj, info):
     # Return the author of the comment
-    return obj.author
+    if Comment.author.is_cached(obj):
+        return obj.author
+    return get_loaders(info).users.load(obj.author_id)
 
-@comment_type.field("createdAt")
-def resolve_comment_created_at(obj, info):
-    return obj.created_at.isoformat()
-
-@comment_type.field("updatedAt")
-def resolve_comment_updated_at(obj, info):
-    return obj.updated_at.isoformat()
+comment_type.set_alias("createdAt", "created_at")
+comment_type.set_alias("updatedAt", "updated_at")
 
 @comment_type.field("isAuthor")
 def resolve_comment_is_author(obj, info):
@@ -560,18 +794,34 @@ def resolve_comment_is_author(obj, info):
     if not user:
         return False
         
-    return obj.author.id == user.id
+    return obj.author_id == user.id
 
 # Like Type Resolver
 like_type = ObjectType("Like")
 
 @like_type.field("user")
 def resolve_like_user(obj, info):
-    return obj.user
+    if Like.user.is_cached(obj):
+        return obj.user
+    return get_loaders(info).users.load(obj.user_id)
+
+like_type.set_alias("createdAt", "created_at")
+
+# DateTime: ISO 8601 strings on the wire, aware datetimes in Python
+datetime_scalar = ScalarType("DateTime")
+
+@datetime_scalar.serializer
+def serialize_datetime(value):
+    return value.isoformat()
 
-@like_type.field("createdAt")
-def resolve_like_created_at(obj, info):
-    return obj.created_at.isoformat()
+@datetime_scalar.value_parser
+def parse_datetime_value(value):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f"Invalid DateTime: {value!r}")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
 
 # Create executable schema
-schema = make_executable_schema(type_defs, query, mutation, post_type, user_type, comment_type, like_type)
+schema = make_executable_schema(
+    type_defs, query, mutation, post_type, user_type, comment_type, like_type, datetime_scalar
+)
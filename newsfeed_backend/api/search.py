@@ -0,0 +1,351 @@
+import re
+import threading
+
+from django.db import connections, router, transaction
+from graphql import GraphQLError
+
+from .models import Post
+from .pagination import build_connection, decode_cursor_values, page_size
+
+# Full-text index of posts. Each post has a search document made of its title
+# and content, and each comment one of its own text, so writing a comment only
+# indexes that comment however many the post already has. A post matches when
+# every word of the query is found in it or its comments. The documents are
+# kept up to date by the post/comment signal handlers below (connected in
+# ApiConfig.ready()). Run `manage.py rebuild_search_index` after writing rows
+# without signals, e.g. bulk_create or raw SQL.
+POST_TABLE = 'api_post_search'
+COMMENT_TABLE = 'api_comment_search'
+INDEX_CHUNK_SIZE = 500
+
+
+class SearchBackend:
+    """The index for one database vendor."""
+
+    def create(self, cursor):
+        raise NotImplementedError
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {COMMENT_TABLE}')
+        cursor.execute(f'DROP TABLE IF EXISTS {POST_TABLE}')
+
+    def index_posts(self, cursor, post_ids):
+        """(Re)build the documents of `post_ids`. Ids of posts that no longer exist are skipped."""
+        raise NotImplementedError
+
+    def index_comments(self, cursor, comment_ids):
+        """(Re)build the documents of `comment_ids`. Ids of comments that no longer exist are skipped."""
+        raise NotImplementedError
+
+    def remove(self, cursor, post_ids, comment_ids):
+        """Drop the documents of deleted posts and comments."""
+        raise NotImplementedError
+
+    def prune(self, cursor):
+        """Drop documents whose post or comment no longer exists."""
+        raise NotImplementedError
+
+    def search(self, cursor, words, limit, after=None):
+        """Up to `limit` (post_id, score) matches, best first, after the (score, post_id) `after`."""
+        raise NotImplementedError
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def query_words(text):
+    # Every word must match; anything else in the input is ignored rather than
+    # interpreted as query syntax
+    words = []
+    for word in re.findall(r'\w+', text):
+        if word.lower() not in words:
+            words.append(word.lower())
+    return words
+
+
+class SQLiteSearch(SearchBackend):
+    # FTS5 tables whose rowids are the post and comment ids. Each word is
+    # matched and ranked with BM25 on its own, and a post scores the sum over
+    # its words, its own document and its comments'. A hit in the title is
+    # worth more than one in the content, and that more than one in a comment.
+    POST_WEIGHTS = (10.0, 4.0)
+    COMMENT_WEIGHTS = (1.0, 0.0)
+
+    def create(self, cursor):
+        cursor.execute(f"CREATE VIRTUAL TABLE {POST_TABLE} USING fts5(title, content, tokenize='porter unicode61')")
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {COMMENT_TABLE} USING fts5(content, post_id UNINDEXED, tokenize='porter unicode61')"
+        )
+
+    def index_posts(self, cursor, post_ids):
+        cursor.execute(
+            f"""
+            INSERT OR REPLACE INTO {POST_TABLE} (rowid, title, content)
+            SELECT id, title, content FROM api_post WHERE id IN ({placeholders(post_ids)})
+            """,
+            post_ids,
+        )
+
+    def index_comments(self, cursor, comment_ids):
+        cursor.execute(
+            f"""
+            INSERT OR REPLACE INTO {COMMENT_TABLE} (rowid, content, post_id)
+            SELECT id, content, post_id FROM api_comment WHERE id IN ({placeholders(comment_ids)})
+            """,
+            comment_ids,
+        )
+
+    def remove(self, cursor, post_ids, comment_ids):
+        if post_ids:
+            cursor.execute(f'DELETE FROM {POST_TABLE} WHERE rowid IN ({placeholders(post_ids)})', post_ids)
+        if comment_ids:
+            cursor.execute(f'DELETE FROM {COMMENT_TABLE} WHERE rowid IN ({placeholders(comment_ids)})', comment_ids)
+
+    def prune(self, cursor):
+        cursor.execute(f'DELETE FROM {POST_TABLE} WHERE rowid NOT IN (SELECT id FROM api_post)')
+        cursor.execute(f'DELETE FROM {COMMENT_TABLE} WHERE rowid NOT IN (SELECT id FROM api_comment)')
+
+    def search(self, cursor, words, limit, after=None):
+        post_weights = ', '.join(str(weight) for weight in self.POST_WEIGHTS)
+        comment_weights = ', '.join(str(weight) for weight in self.COMMENT_WEIGHTS)
+        hits = []
+        params = []
+        for number, word in enumerate(words):
+            hits.append(
+                f"SELECT rowid AS post_id, {number} AS word, -bm25({POST_TABLE}, {post_weights}) AS score "
+                f"FROM {POST_TABLE} WHERE {POST_TABLE} MATCH %s "
+                f"UNION ALL "
+                f"SELECT post_id, {number}, -bm25({COMMENT_TABLE}, {comment_weights}) "
+                f"FROM {COMMENT_TABLE} WHERE {COMMENT_TABLE} MATCH %s"
+            )
+            # Quoted, so FTS5 reads it as a plain term
+            params += [f'"{word}"', f'"{word}"']
+        params.append(len(words))
+        seek = ''
+        if after is not None:
+            seek = 'WHERE score < %s OR (score = %s AND post_id < %s)'
+            params += [after[0], after[0], after[1]]
+        cursor.execute(
+            f"""
+            SELECT post_id, score FROM (
+                SELECT post_id, SUM(score) AS score FROM ({' UNION ALL '.join(hits)})
+                GROUP BY post_id HAVING COUNT(DISTINCT word) = %s
+            ) {seek}
+            ORDER BY score DESC, post_id DESC LIMIT %s
+            """,
+            params + [limit],
+        )
+        return cursor.fetchall()
+
+
+class PostgreSQLSearch(SearchBackend):
+    # tsvectors with GIN indexes. Title, content and comments are weighted A,
+    # B and C, which ts_rank_cd ranks in that order; a post scores the sum of
+    # its own and its comments' ranks over the words of the query.
+    CONFIG = 'english'
+
+    def create(self, cursor):
+        cursor.execute(
+            f"""
+            CREATE TABLE {POST_TABLE} (
+                post_id bigint PRIMARY KEY REFERENCES api_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+                document tsvector NOT NULL
+            )
+            """
+        )
+        cursor.execute(f'CREATE INDEX {POST_TABLE}_document ON {POST_TABLE} USING GIN (document)')
+        cursor.execute(
+            f"""
+            CREATE TABLE {COMMENT_TABLE} (
+                comment_id bigint PRIMARY KEY
+                    REFERENCES api_comment (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+                post_id bigint NOT NULL,
+                document tsvector NOT NULL
+            )
+            """
+        )
+        cursor.execute(f'CREATE INDEX {COMMENT_TABLE}_document ON {COMMENT_TABLE} USING GIN (document)')
+
+    def index_posts(self, cursor, post_ids):
+        cursor.execute(
+            f"""
+            INSERT INTO {POST_TABLE} (post_id, document)
+            SELECT id, setweight(to_tsvector(%s, title), 'A') || setweight(to_tsvector(%s, content), 'B')
+            FROM api_post WHERE id = ANY(%s)
+            ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document
+            """,
+            [self.CONFIG, self.CONFIG, list(post_ids)],
+        )
+
+    def index_comments(self, cursor, comment_ids):
+        cursor.execute(
+            f"""
+            INSERT INTO {COMMENT_TABLE} (comment_id, post_id, document)
+            SELECT id, post_id, setweight(to_tsvector(%s, content), 'C')
+            FROM api_comment WHERE id = ANY(%s)
+            ON CONFLICT (comment_id) DO UPDATE SET post_id = EXCLUDED.post_id, document = EXCLUDED.document
+            """,
+            [self.CONFIG, list(comment_ids)],
+        )
+
+    def remove(self, cursor, post_ids, comment_ids):
+        # Documents are deleted with their post or comment by the foreign keys
+        pass
+
+    def prune(self, cursor):
+        pass
+
+    def search(self, cursor, words, limit, after=None):
+        params = [list(words), self.CONFIG]
+        seek = ''
+        if after is not None:
+            seek = 'WHERE score < %s OR (score = %s AND post_id < %s)'
+            params += [after[0], after[0], after[1]]
+        # Stop words have empty queries and are left out, as a query of only
+        # stop words matches nothing
+        cursor.execute(
+            f"""
+            WITH words AS (
+                SELECT word.n, query
+                FROM unnest(%s::text[]) WITH ORDINALITY AS word (text, n), plainto_tsquery(%s, word.text) query
+                WHERE numnode(query) > 0
+            ), hits AS (
+                SELECT s.post_id, w.n, ts_rank_cd(s.document, w.query) AS score
+                FROM {POST_TABLE} s JOIN words w ON s.document @@ w.query
+                UNION ALL
+                SELECT c.post_id, w.n, ts_rank_cd(c.document, w.query)
+                FROM {COMMENT_TABLE} c JOIN words w ON c.document @@ w.query
+            )
+            SELECT post_id, score FROM (
+                SELECT post_id, SUM(score)::float8 AS score FROM hits
+                GROUP BY post_id HAVING COUNT(DISTINCT n) = (SELECT COUNT(*) FROM words)
+            ) ranked {seek}
+            ORDER BY score DESC, post_id DESC LIMIT %s
+            """,
+            params + [limit],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearch,
+    'postgresql': PostgreSQLSearch,
+}
+
+
+def get_backend(connection):
+    backend_class = BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
+
+
+def index(post_ids=(), comment_ids=(), using='default'):
+    """(Re)build the documents of the given posts and comments."""
+    connection = connections[using]
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    post_ids, comment_ids = sorted(post_ids), sorted(comment_ids)
+    with connection.cursor() as cursor:
+        # Chunked to stay well under the database's bound parameter limit
+        for start in range(0, len(post_ids), INDEX_CHUNK_SIZE):
+            backend.index_posts(cursor, post_ids[start:start + INDEX_CHUNK_SIZE])
+        for start in range(0, len(comment_ids), INDEX_CHUNK_SIZE):
+            backend.index_comments(cursor, comment_ids[start:start + INDEX_CHUNK_SIZE])
+
+
+def search_posts(text, first=None, after=None):
+    """One page of posts matching `text`, best match first, as a PostConnection."""
+    # Read from wherever Post reads go, i.e. a replica during GraphQL queries
+    connection = connections[router.db_for_read(Post)]
+    backend = get_backend(connection)
+    if backend is None:
+        raise GraphQLError("Search is not available on this database")
+
+    limit = page_size(first)
+    seek = None
+    if after:
+        score, post_id = decode_cursor_values(after, 2)
+        if not isinstance(score, (int, float)) or not isinstance(post_id, int):
+            raise GraphQLError("Invalid cursor")
+        seek = (score, post_id)
+
+    words = query_words(text)
+    if not words:
+        return build_connection([], limit, after, None)
+    # Fetch one extra match to find out if there is a next page
+    with connection.cursor() as cursor:
+        matches = backend.search(cursor, words, limit + 1, seek)
+    posts = Post.objects.using(connection.alias).select_related('author').in_bulk([post_id for post_id, _ in matches])
+    scores = {}
+    rows = []
+    for post_id, score in matches:
+        # A post deleted since it was indexed
+        if post_id in posts:
+            scores[post_id] = score
+            rows.append(posts[post_id])
+    return build_connection(rows, limit, after, lambda post: [scores[post.id], post.id])
+
+
+# Incremental index maintenance. Changes are collected per database and
+# indexed once the transaction commits, so a post edited several times in one
+# transaction is only reindexed once, and a post deleted with its comments
+# costs one DELETE per table.
+_pending = threading.local()
+
+
+def pending_changes(using):
+    if not hasattr(_pending, 'changes'):
+        _pending.changes = {}
+    return _pending.changes.setdefault(
+        using, {'posts': set(), 'comments': set(), 'deleted_posts': set(), 'deleted_comments': set()}
+    )
+
+
+def flush(using):
+    changes = _pending.changes.pop(using, None)
+    if not changes:
+        return
+    connection = connections[using]
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    deleted_posts, deleted_comments = sorted(changes['deleted_posts']), sorted(changes['deleted_comments'])
+    with connection.cursor() as cursor:
+        for start in range(0, max(len(deleted_posts), len(deleted_comments)), INDEX_CHUNK_SIZE):
+            chunk = slice(start, start + INDEX_CHUNK_SIZE)
+            backend.remove(cursor, deleted_posts[chunk], deleted_comments[chunk])
+    # Deleted ids are re-read too: the row may be back under the same id, or
+    # its delete may have been rolled back
+    index(changes['posts'] | changes['deleted_posts'], changes['comments'] | changes['deleted_comments'], using)
+
+
+def schedule(kind, pk, using):
+    pending_changes(using)[kind].add(pk)
+    # Only the first callback to run finds anything to do. Ids from a rolled
+    # back transaction go with the next flush, which just re-reads their rows.
+    transaction.on_commit(lambda: flush(using), using=using)
+
+
+def post_saved(sender, instance, raw=False, using='default', update_fields=None, **kwargs):
+    # Fixture loading (raw) is followed by rebuild_search_index
+    if raw:
+        return
+    # Counter and timestamp updates don't change the document
+    if update_fields is not None and not {'title', 'content'} & set(update_fields):
+        return
+    schedule('posts', instance.pk, using)
+
+
+def post_deleted(sender, instance, using='default', **kwargs):
+    schedule('deleted_posts', instance.pk, using)
+
+
+def comment_saved(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    schedule('comments', instance.pk, using)
+
+
+def comment_deleted(sender, instance, using='default', **kwargs):
+    schedule('deleted_comments', instance.pk, using)
@@ -0,0 +1,124 @@
+from ariadne import SubscriptionType
+from ariadne.asgi.handlers import GraphQLTransportWSHandler
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+
+from .auth import get_user_from_token
+from .documents import document_cache
+from .loaders import AsyncDataLoader, Loaders
+from .models import Comment, Post
+from .pubsub import COMMENT_ADDED, POST_CREATED, POST_LIKE_COUNT_CHANGED, POST_UPDATED, get_broker
+from .routing import operation_type
+from .schema import get_user_from_context
+
+# Subscriptions are served over WebSocket by the ASGI app (see asgi.py), using
+# the graphql-transport-ws protocol. Mutations publish small messages (ids and
+# counts) through api/pubsub.py; each subscriber loads the changed object so
+# viewer-specific fields like isLiked are resolved for that subscriber.
+subscription = SubscriptionType()
+
+
+async def authenticate_websocket(websocket, payload):
+    # Clients send their token in the connection_init payload, since browsers
+    # can't set headers on a WebSocket
+    payload = payload if isinstance(payload, dict) else {}
+    authorization = payload.get('authorization') or payload.get('Authorization') or ''
+    user = None
+    if authorization.startswith('JWT '):
+        user = await sync_to_async(get_user_from_token)(authorization.split(' ')[1])
+    websocket.scope['user'] = user or AnonymousUser()
+
+
+def requested_operation_type(data):
+    # 'query', 'mutation' or 'subscription', or None when the request can't be
+    # parsed (the handler reports that itself)
+    try:
+        return operation_type(document_cache.parse(data['query']).document, data.get('operationName'))
+    except Exception:
+        return None
+
+
+class SubscriptionsOnlyWSHandler(GraphQLTransportWSHandler):
+    """
+    graphql-transport-ws handler that only runs subscriptions. Ariadne would
+    execute queries and mutations sent over the socket too, bypassing the
+    cost analysis and rate limits the HTTP views apply; those go over HTTP.
+    """
+
+    async def handle_websocket_subscribe(self, websocket, data, operation_id, client_context):
+        requested = requested_operation_type(data) if isinstance(data, dict) else None
+        if client_context.connection_acknowledged and requested not in (None, 'subscription'):
+            await websocket.send_json({
+                'type': self.GQL_ERROR,
+                'id': operation_id,
+                'payload': [{
+                    'message': f'Only subscriptions run over the WebSocket, send {requested} operations over HTTP',
+                    'extensions': {'code': 'OPERATION_NOT_ALLOWED'},
+                }],
+            })
+            return
+        await super().handle_websocket_subscribe(websocket, data, operation_id, client_context)
+
+
+def get_websocket_context(websocket, data):
+    context = {'request': websocket}
+    context['loaders'] = Loaders(get_user_from_context(context), loader_class=AsyncDataLoader)
+    return context
+
+
+def refresh_loaders(info):
+    # A subscription's context lives as long as the subscription; start each
+    # event with empty loaders so it never sees an earlier event's data
+    info.context['loaders'] = Loaders(get_user_from_context(info.context), loader_class=AsyncDataLoader)
+
+
+def matches_post(message, post_id):
+    return post_id is None or str(message['postId']) == str(post_id)
+
+
+async def post_events(channel, post_id=None):
+    async for message in get_broker().subscribe(channel):
+        if not matches_post(message, post_id):
+            continue
+        post = await Post.objects.select_related('author').filter(pk=message['postId']).afirst()
+        # Deleted before we got to it
+        if post is not None:
+            yield post
+
+
+async def comment_events(post_id=None):
+    async for message in get_broker().subscribe(COMMENT_ADDED):
+        if not matches_post(message, post_id):
+            continue
+        comment = await Comment.objects.select_related('author').filter(pk=message['commentId']).afirst()
+        if comment is not None:
+            yield comment
+
+
+@subscription.source("postCreated")
+def post_created_source(obj, info):
+    return post_events(POST_CREATED)
+
+
+@subscription.source("postUpdated")
+def post_updated_source(obj, info):
+    return post_events(POST_UPDATED)
+
+
+@subscription.source("postLikeCountChanged")
+def post_like_count_changed_source(obj, info, postId=None):
+    return post_events(POST_LIKE_COUNT_CHANGED, postId)
+
+
+@subscription.source("commentAdded")
+def comment_added_source(obj, info, postId=None):
+    return comment_events(postId)
+
+
+@subscription.field("postCreated")
+@subscription.field("postUpdated")
+@subscription.field("postLikeCountChanged")
+@subscription.field("commentAdded")
+def resolve_event(obj, info, **kwargs):
+    refresh_loaders(info)
+    return obj
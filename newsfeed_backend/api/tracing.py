@@ -0,0 +1,268 @@
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from ariadne.contrib.tracing.utils import format_path, should_trace
+from ariadne.types import Extension
+from django.conf import settings
+from django.db.models import QuerySet
+from graphql.pyutils import is_awaitable
+
+# Defaults for settings.GRAPHQL_TRACING
+DEFAULT_HEADER = 'HTTP_X_GRAPHQL_TRACE'
+DEFAULT_EXPORTERS = ('extensions',)
+DEFAULT_MAX_SPANS = 2000
+
+# The resolver span currently running, so SQL can be attributed to it. Context
+# variables follow the async view's tasks and its sync_to_async threads.
+current_span = ContextVar('graphql_trace_span', default=None)
+
+
+def tracing_options():
+    return getattr(settings, 'GRAPHQL_TRACING', {})
+
+
+def tracing_requested(request, user):
+    """
+    Tracing is opt-in: on for every request with ENABLED, or per request with
+    the trace header, which is only honoured in DEBUG or for staff since
+    traces include SQL.
+    """
+    options = tracing_options()
+    if options.get('ENABLED', False):
+        return True
+    if not request.META.get(options.get('HEADER', DEFAULT_HEADER)):
+        return False
+    return settings.DEBUG or bool(user is not None and user.is_staff)
+
+
+def new_id(length):
+    return os.urandom(length).hex()
+
+
+class Span:
+    __slots__ = ('span_id', 'parent', 'name', 'path', 'start', 'end', 'sql_count', 'sql_time', 'attributes')
+
+    def __init__(self, name, parent=None, path=None, attributes=None):
+        self.span_id = new_id(8)
+        self.parent = parent
+        self.name = name
+        self.path = path
+        self.start = time.time_ns()
+        self.end = None
+        self.sql_count = 0
+        self.sql_time = 0
+        self.attributes = attributes or {}
+
+    def finish(self):
+        self.end = time.time_ns()
+
+    @property
+    def duration(self):
+        return (self.end or time.time_ns()) - self.start
+
+
+class Trace:
+    """
+    Everything recorded for one GraphQL request: a root span, one span per
+    traced resolver, one per SQL query (a child of the resolver that ran it),
+    and totals per Type.field.
+    """
+
+    def __init__(self, operation_name=None):
+        self.trace_id = new_id(16)
+        self.root = Span('graphql.request', attributes={'graphql.operation.name': operation_name or ''})
+        self.spans = []
+        self.dropped = 0
+        self.max_spans = tracing_options().get('MAX_SPANS', DEFAULT_MAX_SPANS)
+        self.fields = {}
+        # Response path -> resolver span, to parent spans the way the result nests
+        self._by_path = {}
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def start_resolver(self, info):
+        path = tuple(format_path(info.path))
+        # Nearest traced ancestor field; list indices and untraced fields are skipped
+        parent = None
+        for end in range(len(path) - 1, 0, -1):
+            parent = self._by_path.get(path[:end])
+            if parent is not None:
+                break
+        span = Span(f'{info.parent_type.name}.{info.field_name}', parent=parent or self.root, path='.'.join(map(str, path)))
+        self._by_path[path] = span
+        return span
+
+    def finish_resolver(self, span):
+        span.finish()
+        self.add(span)
+        with self._lock:
+            totals = self.fields.setdefault(span.name, {'count': 0, 'time': 0, 'sql_count': 0, 'sql_time': 0})
+            totals['count'] += 1
+            totals['time'] += span.duration
+            totals['sql_count'] += span.sql_count
+            totals['sql_time'] += span.sql_time
+
+    def execute_sql(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        owner = current_span.get() or self.root
+        span = Span('db.query', parent=owner, attributes={'db.statement': sql, 'db.system': context['connection'].vendor})
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            span.finish()
+            with self._lock:
+                owner.sql_count += 1
+                owner.sql_time += span.duration
+            self.add(span)
+
+    def finish(self):
+        self.root.finish()
+
+    # Output formats
+
+    def as_extension(self):
+        """Summary returned to the client in `extensions.tracing`."""
+        ms = 1e-6
+        resolvers = [
+            {
+                'path': span.path,
+                'field': span.name,
+                'startOffsetMs': round((span.start - self.root.start) * ms, 3),
+                'durationMs': round(span.duration * ms, 3),
+                'sqlQueries': span.sql_count,
+            }
+            for span in self.spans if span.path is not None
+        ]
+        sql = [
+            {
+                'sql': span.attributes['db.statement'],
+                'durationMs': round(span.duration * ms, 3),
+                'path': span.parent.path,
+            }
+            for span in self.spans if span.name == 'db.query'
+        ]
+        fields = {
+            name: {
+                'count': totals['count'],
+                'totalMs': round(totals['time'] * ms, 3),
+                'sqlQueries': totals['sql_count'],
+                'sqlMs': round(totals['sql_time'] * ms, 3),
+            }
+            for name, totals in sorted(self.fields.items(), key=lambda item: -item[1]['time'])
+        }
+        return {
+            'traceId': self.trace_id,
+            'durationMs': round(self.root.duration * ms, 3),
+            'sqlQueries': len(sql),
+            'sqlMs': round(sum(span.duration for span in self.spans if span.name == 'db.query') * ms, 3),
+            'fields': fields,
+            'resolvers': resolvers,
+            'sql': sql,
+            'droppedSpans': self.dropped,
+        }
+
+    def as_otlp(self):
+        """The trace as an OTLP/JSON ExportTraceServiceRequest, as accepted by OpenTelemetry collectors."""
+        def attributes(span):
+            values = dict(span.attributes)
+            if span.path is not None:
+                values['graphql.field.path'] = span.path
+            return [{'key': key, 'value': {'stringValue': str(value)}} for key, value in values.items()]
+
+        def otlp_span(span):
+            data = {
+                'traceId': self.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': 2 if span is self.root else 1,  # SERVER / INTERNAL
+                'startTimeUnixNano': str(span.start),
+                'endTimeUnixNano': str(span.end or span.start),
+                'attributes': attributes(span),
+            }
+            if span.parent is not None:
+                data['parentSpanId'] = span.parent.span_id
+            return data
+
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': 'newsfeed-graphql'}}]},
+                'scopeSpans': [{
+                    'scope': {'name': 'api.tracing'},
+                    'spans': [otlp_span(self.root)] + [otlp_span(span) for span in self.spans],
+                }],
+            }],
+        }
+
+
+_export_lock = threading.Lock()
+
+
+def export(trace):
+    """Send a finished trace to the configured exporters other than `extensions`."""
+    options = tracing_options()
+    if 'file' in options.get('EXPORTERS', DEFAULT_EXPORTERS) and options.get('FILE'):
+        # One OTLP/JSON request per line, the OpenTelemetry collector file exporter format
+        line = json.dumps(trace.as_otlp())
+        with _export_lock, open(options['FILE'], 'a') as f:
+            f.write(line + '\n')
+
+
+class TracingExtension(Extension):
+    """
+    Times every resolver that isn't a plain attribute lookup and attributes
+    SQL to it. Only active when the view put a Trace in the context.
+    """
+
+    def __init__(self):
+        self.trace = None
+
+    def request_started(self, context):
+        self.trace = context.get('trace') if isinstance(context, dict) else None
+
+    def resolve(self, next_, obj, info, **kwargs):
+        if self.trace is None or not should_trace(info):
+            return next_(obj, info, **kwargs)
+
+        span = self.trace.start_resolver(info)
+        token = current_span.set(span)
+        try:
+            result = next_(obj, info, **kwargs)
+            # A lazy QuerySet would run its SQL while the list is completed,
+            # after this span ends, and be charged to the request instead
+            if isinstance(result, QuerySet):
+                result = list(result)
+        except Exception:
+            self.trace.finish_resolver(span)
+            raise
+        finally:
+            current_span.reset(token)
+
+        if not is_awaitable(result):
+            self.trace.finish_resolver(span)
+            return result
+
+        async def await_result():
+            token = current_span.set(span)
+            try:
+                return await result
+            finally:
+                current_span.reset(token)
+                self.trace.finish_resolver(span)
+
+        return await_result()
+
+    def format(self, context):
+        if self.trace is None:
+            return None
+        if 'extensions' not in tracing_options().get('EXPORTERS', DEFAULT_EXPORTERS):
+            return None
+        return {'tracing': self.trace.as_extension()}
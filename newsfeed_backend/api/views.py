@@ -1,3 +1,304 @@
-from django.shortcuts import render
+import json
+from typing import cast
 
-# Create your views here.
+from ariadne.exceptions import HttpBadRequestError
+from ariadne.graphql import graphql, graphql_sync
+from ariadne_django.views import GraphQLAsyncView, GraphQLView
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponseBadRequest
+from graphql import GraphQLSchema
+from . import http_cache, rate_limit, response_cache
+from .documents import PersistedQueryError, document_cache, parse_request
+from .encoding import GraphQLResponse
+from .auth import get_user_from_token
+from .loaders import AsyncDataLoader, DataLoader, Loaders
+from .query_cost import QueryCostError, analyze
+from .routing import choose_database, operation_type, record_write, use_database
+from .schema import get_user_from_context
+from .tracing import Span, Trace, TracingExtension, export, tracing_requested
+
+
+def add_cost_extension(result, analysis):
+    # Report the computed cost to the client in the response extensions
+    if analysis is not None:
+        result.setdefault('extensions', {})['cost'] = analysis.as_dict()
+    return result
+
+
+class PreparedRequest:
+    """Everything worked out about a GraphQL request before it is executed."""
+
+    def __init__(self):
+        self.data = None
+        self.parsed = None
+        self.kwargs = None
+        self.analysis = None
+        self.plan = None
+        self.trace = None
+        self.operation = None
+        # Alias the operation reads from, see api/routing.py
+        self.database = None
+        # GET requests are queries that may be answered 304, see api/http_cache.py
+        self.is_get = False
+        self.validator = None
+        # Set when the request is answered without executing it
+        self.response = None
+
+    @property
+    def document(self):
+        return self.parsed.document if self.parsed else None
+
+
+def is_graphql_get(request):
+    # A GET carrying an operation, as opposed to a browser opening the playground
+    return request.method == 'GET' and ('query' in request.GET or 'extensions' in request.GET)
+
+
+class GraphQLRequestMixin:
+    """
+    Request handling shared by the sync (WSGI) and async (ASGI) views: auth,
+    persisted queries, cost analysis, rate limits, conditional GETs and the
+    response cache.
+    All of it may touch the database or the cache, so the async view runs it
+    in a thread.
+    """
+    loader_class = DataLoader
+
+    def extract_data_from_request(self, request):
+        if request.method != 'GET':
+            return super().extract_data_from_request(request)
+        # GraphQL over HTTP: query and operationName as is, variables and extensions as JSON
+        data = {'query': request.GET.get('query'), 'operationName': request.GET.get('operationName')}
+        for name in ('variables', 'extensions'):
+            if request.GET.get(name):
+                try:
+                    data[name] = json.loads(request.GET[name])
+                except ValueError:
+                    raise HttpBadRequestError(f"The '{name}' query parameter is not valid JSON") from None
+        return data
+
+    def get_context_for_request(self, request):
+        context = {"request": request}
+        
+        # Extract token from Authorization header
+        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+        if auth_header.startswith('JWT '):
+            token = auth_header.split(' ')[1]
+            # Verified tokens are cached, so repeat requests skip the decode and the user lookup
+            user = get_user_from_token(token)
+            if user:
+                # Attach user to request if token is valid
+                request.user = user
+        
+        # Fresh DataLoaders per request so batching and caching never leak between requests
+        user = get_user_from_context(context)
+        context["loaders"] = Loaders(user, loader_class=self.loader_class)
+        
+        # Opt-in resolver and SQL tracing, see api/tracing.py
+        if tracing_requested(request, user):
+            context["trace"] = Trace()
+                
+        return context
+
+    def get_extensions_for_request(self, request, context):
+        extensions = list(super().get_extensions_for_request(request, context) or [])
+        if isinstance(context, dict) and "trace" in context:
+            extensions.append(TracingExtension)
+        return extensions
+
+    def prepare_request(self, request):
+        prepared = PreparedRequest()
+        prepared.is_get = request.method == 'GET'
+        try:
+            prepared.data = data = self.extract_data_from_request(request)
+        except HttpBadRequestError as error:
+            prepared.response = HttpResponseBadRequest(error.message)
+            return prepared
+        
+        # Resolve persisted query hashes and reuse parsed documents
+        if isinstance(data, dict):
+            try:
+                prepared.parsed = parse_request(data)
+            except PersistedQueryError as error:
+                prepared.response = GraphQLResponse({'errors': [error.formatted()]})
+                return prepared
+        
+        prepared.kwargs = self.get_kwargs_graphql(request)
+        context = prepared.kwargs['context_value']
+        user = get_user_from_context(context)
+        prepared.trace = context.get('trace')
+        if prepared.trace is not None:
+            prepared.trace.root.attributes['graphql.operation.name'] = data.get('operationName') or ''
+        if prepared.document is None:
+            return prepared
+        
+        # Queries read from a replica unless this user wrote something moments ago
+        prepared.operation = operation_type(prepared.document, data.get('operationName'))
+        prepared.database = choose_database(prepared.operation, user)
+        
+        # GET must stay safe to repeat and to cache, so it only runs queries
+        if prepared.is_get and prepared.operation in ('mutation', 'subscription'):
+            prepared.response = GraphQLResponse(
+                {'errors': [{'message': f'Send {prepared.operation} operations with POST'}]},
+                status=405, headers={'Allow': 'POST'},
+            )
+            return prepared
+        
+        # Reject operations over this client's cost/depth budget before doing any work
+        try:
+            prepared.analysis = analyze(
+                self.schema, prepared.document, data, user=user, ip_address=request.META.get('REMOTE_ADDR')
+            )
+        except QueryCostError as error:
+            prepared.response = GraphQLResponse(
+                {'errors': [error.formatted()], 'extensions': {'cost': error.analysis.as_dict()}}, status=400
+            )
+            return prepared
+        
+        # Protect capacity from clients hammering logins, likes, comments and search
+        try:
+            rate_limit.check(self.schema, prepared.document, data, user=user, ip_address=request.META.get('REMOTE_ADDR'))
+        except rate_limit.RateLimitError as error:
+            prepared.response = GraphQLResponse(
+                {'errors': [error.formatted()]}, status=429, headers={'Retry-After': str(error.retry_after)}
+            )
+            return prepared
+        
+        # Traced requests always execute, and their traces must not be cached
+        if prepared.trace is not None:
+            return prepared
+        
+        # Nothing the result depends on changed since the client's copy: 304 without executing
+        if prepared.is_get:
+            prepared.validator = http_cache.validator_for(
+                self.schema, prepared.document, data, user, prepared.parsed.normalized
+            )
+            if prepared.validator is not None and http_cache.if_none_match(request, prepared.validator.etag):
+                prepared.response = http_cache.not_modified(prepared.validator, authenticated=user is not None)
+                return prepared
+        
+        # Serve shared results for queries that don't depend on the viewer
+        prepared.plan = response_cache.plan_for(
+            self.schema, prepared.document, data, authenticated=user is not None,
+            normalized_query=prepared.parsed.normalized,
+        )
+        if prepared.plan is not None:
+            result = response_cache.lookup(prepared.plan)
+            if result is not None:
+                headers = {'X-Cache': 'HIT', **self.http_cache_headers(prepared, result, executed=False)}
+                prepared.response = GraphQLResponse(add_cost_extension(result, prepared.analysis), headers=headers)
+        return prepared
+
+    def http_cache_headers(self, prepared, result, executed=True):
+        # ETag and Cache-Control, for GET queries only
+        if not prepared.is_get:
+            return {}
+        validator = prepared.validator
+        if result.get('errors') or (validator is not None and executed and not validator.still_current()):
+            validator = None
+        user = get_user_from_context(prepared.kwargs['context_value'])
+        return http_cache.cache_headers(validator, authenticated=user is not None)
+
+    def get_execution_kwargs(self, prepared):
+        return {
+            'query_document': prepared.document,
+            'query_validator': document_cache.validate,
+            **prepared.kwargs,
+        }
+
+    def traced_connections(self, prepared):
+        # Reads go to the chosen database (maybe a replica), writes to the primary
+        aliases = {DEFAULT_DB_ALIAS, prepared.database or DEFAULT_DB_ALIAS}
+        return [connections[alias] for alias in sorted(aliases)]
+
+    def start_trace(self, prepared):
+        # Attribute SQL to resolvers. Runs on the thread that will run the queries.
+        if prepared.trace is not None:
+            for connection in self.traced_connections(prepared):
+                connection.execute_wrappers.append(prepared.trace.execute_sql)
+
+    def stop_trace(self, prepared):
+        if prepared.trace is None:
+            return
+        for connection in self.traced_connections(prepared):
+            if prepared.trace.execute_sql in connection.execute_wrappers:
+                connection.execute_wrappers.remove(prepared.trace.execute_sql)
+
+    def finish_request(self, prepared, success, result):
+        if prepared.operation == 'mutation':
+            record_write(get_user_from_context(prepared.kwargs['context_value']))
+        
+        headers = {}
+        if prepared.plan is not None:
+            headers['X-Cache'] = 'MISS'
+            if success and not result.get('errors'):
+                response_cache.store(prepared.plan, result)
+        
+        headers.update(self.http_cache_headers(prepared, result))
+        status_code = 200 if success else 400
+        trace = prepared.trace
+        if trace is None:
+            return GraphQLResponse(add_cost_extension(result, prepared.analysis), status=status_code, headers=headers)
+        
+        # Encoding only shows up in exported traces; the response is already built by then
+        span = Span('graphql.serialize', parent=trace.root)
+        response = GraphQLResponse(add_cost_extension(result, prepared.analysis), status=status_code, headers=headers)
+        span.finish()
+        trace.add(span)
+        trace.finish()
+        export(trace)
+        return response
+
+
+# Create a custom GraphQLView that includes the request in the context and handles JWT auth
+class CustomGraphQLView(GraphQLRequestMixin, GraphQLView):
+    def get(self, request, *args, **kwargs):
+        # Queries can be sent with GET too; a bare GET opens the playground
+        if is_graphql_get(request):
+            return self.post(request, *args, **kwargs)
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        prepared = self.prepare_request(request)
+        if prepared.response is not None:
+            return prepared.response
+        
+        self.start_trace(prepared)
+        try:
+            with use_database(prepared.database):
+                success, result = graphql_sync(
+                    cast(GraphQLSchema, self.schema), prepared.data, **self.get_execution_kwargs(prepared)
+                )
+        finally:
+            self.stop_trace(prepared)
+        return self.finish_request(prepared, success, result)
+
+
+# Async counterpart mounted by asgi.py: resolvers run on the event loop, so one
+# worker can keep many feed requests in flight while they wait on the database
+class AsyncGraphQLView(GraphQLRequestMixin, GraphQLAsyncView):
+    loader_class = AsyncDataLoader
+
+    async def get(self, request, *args, **kwargs):
+        if is_graphql_get(request):
+            return await self.post(request, *args, **kwargs)
+        return await super().get(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        prepared = await sync_to_async(self.prepare_request)(request)
+        if prepared.response is not None:
+            return prepared.response
+        
+        if prepared.trace is not None:
+            await sync_to_async(self.start_trace)(prepared)
+        try:
+            # Resolvers' sync_to_async threads inherit the chosen database
+            with use_database(prepared.database):
+                success, result = await graphql(
+                    cast(GraphQLSchema, self.schema), prepared.data, **self.get_execution_kwargs(prepared)
+                )
+        finally:
+            if prepared.trace is not None:
+                await sync_to_async(self.stop_trace)(prepared)
+        return await sync_to_async(self.finish_request)(prepared, success, result)
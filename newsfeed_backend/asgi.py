@@ -9,8 +9,41 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
 
-application = get_asgi_application()
\ No newline at end of file
+# URLconf with the async GraphQL view; WSGI keeps using settings.ROOT_URLCONF
+ASGI_URLCONF = 'asgi_urls'
+
+
+class NewsfeedASGIHandler(ASGIHandler):
+    async def get_response_async(self, request):
+        request.urlconf = ASGI_URLCONF
+        return await super().get_response_async(request)
+
+
+django.setup(set_prefix=False)
+
+# Imported after setup: the schema needs the app registry
+from ariadne.asgi import GraphQL  # noqa: E402
+from api.async_schema import async_schema  # noqa: E402
+from api.subscriptions import SubscriptionsOnlyWSHandler, authenticate_websocket, get_websocket_context  # noqa: E402
+
+# GraphQL subscriptions; queries and mutations are refused here and go over HTTP
+websocket_application = GraphQL(
+    async_schema,
+    context_value=get_websocket_context,
+    websocket_handler=SubscriptionsOnlyWSHandler(on_connect=authenticate_websocket),
+)
+http_application = NewsfeedASGIHandler()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        if scope['path'].rstrip('/') == '/graphql':
+            return await websocket_application(scope, receive, send)
+        await send({'type': 'websocket.close'})
+        return
+    return await http_application(scope, receive, send)
@@ -0,0 +1,15 @@
+"""
+URL configuration used when the project is served over ASGI (see asgi.py).
+
+Same routes as urls.py, but /graphql/ is served by the async view and schema
+so requests don't each tie up a worker thread.
+"""
+from django.contrib import admin
+from django.urls import path
+from api.async_schema import async_schema
+from api.views import AsyncGraphQLView
+
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("graphql/", AsyncGraphQLView.as_view(schema=async_schema), name="graphql"),
+]
@@ -16,35 +16,8 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from ariadne_django.views import GraphQLView # Import GraphQLView
 from api.schema import schema # Import your schema
-from django.contrib.auth.models import User
-import jwt
-from django.conf import settings
-
-# Create a custom GraphQLView that includes the request in the context and handles JWT auth
-class CustomGraphQLView(GraphQLView):
-    def get_context_for_request(self, request):
-        context = {"request": request}
-        
-        # Extract token from Authorization header
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        if auth_header.startswith('JWT '):
-            token = auth_header.split(' ')[1]
-            try:
-                # Decode and verify the token
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                user_id = payload.get('user_id')
-                if user_id:
-                    # Attach user to request if token is valid
-                    user = User.objects.filter(id=user_id).first()
-                    if user:
-                        request.user = user
-            except jwt.PyJWTError:
-                # Invalid token, continue with anonymous user
-                pass
-                
-        return context
+from api.views import CustomGraphQLView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
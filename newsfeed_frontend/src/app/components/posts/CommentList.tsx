@@ -1,7 +1,7 @@
 'use client';
 
 import React from 'react';
-import { gql, useQuery, useMutation } from '@apollo/client';
+import { gql, useQuery, useMutation, useSubscription } from '@apollo/client';
 import { useAuth } from '../../context/AuthContext';
 import { useTheme } from '../../context/ThemeContext';
 
@@ -38,6 +38,23 @@ const GET_POST_COMMENTS = gql`
   }
 `;
 
+// Comments added by anyone, pushed by the server
+const COMMENT_ADDED_SUBSCRIPTION = gql`
+  subscription OnCommentAdded($postId: ID) {
+    commentAdded(postId: $postId) {
+      id
+      content
+      author {
+        id
+        username
+      }
+      createdAt
+      updatedAt
+      isAuthor
+    }
+  }
+`;
+
 // GraphQL mutation for deleting a comment
 const DELETE_COMMENT = gql`
   mutation DeleteComment($id: ID!) {
@@ -74,13 +91,39 @@ const CommentList: React.FC<CommentListProps> = ({ postId, onCommentCountChange
     }
   });
   
+  // Add new comments to the cached list as they are announced
+  useSubscription<{ commentAdded: CommentProps }>(COMMENT_ADDED_SUBSCRIPTION, {
+    variables: { postId },
+    onData: ({ client, data }) => {
+      const comment = data.data?.commentAdded;
+      const existing = client.cache.readQuery<{ postComments: CommentProps[] }>({
+        query: GET_POST_COMMENTS,
+        variables: { postId }
+      });
+      // Our own comments are handled by CommentForm; skip those and duplicates
+      if (!comment || comment.isAuthor || !existing || existing.postComments.some(c => c.id === comment.id)) {
+        return;
+      }
+      client.cache.writeQuery({
+        query: GET_POST_COMMENTS,
+        variables: { postId },
+        data: { postComments: [comment, ...existing.postComments] }
+      });
+      const count = existing.postComments.length + 1;
+      setCommentCount(count);
+      if (onCommentCountChange) {
+        onCommentCountChange(count);
+      }
+    }
+  });
+  
   // Mutation for deleting a comment
   const [deleteComment] = useMutation(DELETE_COMMENT, {
-    refetchQueries: [{ 
-      query: GET_POST_COMMENTS, 
-      variables: { postId } 
-    }],
-    update: (cache) => {
+    update: (cache, _result, { variables }) => {
+      // Drop the comment from the cache instead of refetching the list
+      cache.evict({ id: cache.identify({ __typename: 'Comment', id: variables?.id }) });
+      cache.gc();
+
       // Update the post's comments count in the cache
       try {
         const postCacheId = cache.identify({ __typename: 'Post', id: postId });
@@ -105,12 +148,7 @@ const CommentList: React.FC<CommentListProps> = ({ postId, onCommentCountChange
         updatedAt
       }
     }
-  `, {
-    refetchQueries: [{ 
-      query: GET_POST_COMMENTS, 
-      variables: { postId } 
-    }]
-  });
+  `);
 
   // Handle edit comment
   const handleEditComment = (comment: CommentProps) => {
@@ -1,7 +1,7 @@
 'use client';
 
 import React, { useState, useEffect } from 'react';
-import { gql, useMutation } from '@apollo/client';
+import { gql, useMutation, Reference } from '@apollo/client';
 import { useAuth } from '../../context/AuthContext';
 import { useTheme } from '../../context/ThemeContext';
 import ErrorMessage from '../common/ErrorMessage';
@@ -12,23 +12,8 @@ const CREATE_POST = gql`
     createPost(input: $input) {
       id
       title
-      content
-      author {
-        id
-        username
-      }
-      createdAt
-    }
-  }
-`;
-
-// Re-using the query from PostList to refetch after mutation
-const GET_ALL_POSTS = gql`
-  query GetAllPosts {
-    allPosts {
-      id
-      title
-      content
+      contentPreview
+      contentTruncated
       author {
         id
         username
@@ -36,6 +21,9 @@ const GET_ALL_POSTS = gql`
       createdAt
       updatedAt
       isAuthor
+      likesCount
+      commentsCount
+      isLiked
     }
   }
 `;
@@ -57,10 +45,22 @@ const CreatePostForm: React.FC<CreatePostFormProps> = () => {
   const { darkMode } = useTheme();
 
   const [createPost, { loading, error: mutationError }] = useMutation(CREATE_POST, {
-    refetchQueries: [
-      { query: GET_ALL_POSTS }
-    ],
-    awaitRefetchQueries: true, // Ensure refetch completes before mutation is considered done
+    // Add the new post to the cached list rather than refetching every post.
+    // The postCreated subscription may have added it already.
+    update: (cache, { data }) => {
+      const post = data?.createPost;
+      if (!post) return;
+      cache.modify({
+        fields: {
+          allPosts(existing: readonly Reference[] = [], { toReference, readField }) {
+            if (existing.some(ref => readField('id', ref) === post.id)) {
+              return existing;
+            }
+            return [toReference(post), ...existing];
+          }
+        }
+      });
+    },
     onCompleted: (data) => {
       console.log("Post creation completed:", data);
       setTitle('');
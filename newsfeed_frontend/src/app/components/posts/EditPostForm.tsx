@@ -1,8 +1,8 @@
 'use client';
 
 import React, { useState, useEffect } from 'react';
-import { gql, useMutation } from '@apollo/client';
-import { PostItemProps } from './PostItem';
+import { gql, useMutation, useQuery } from '@apollo/client';
+import { GET_POST_CONTENT, PostItemProps } from './PostItem';
 import { useAuth } from '../../context/AuthContext';
 
 // Define the GraphQL mutation
@@ -12,6 +12,8 @@ const UPDATE_POST = gql`
       id
       title
       content
+      contentPreview
+      contentTruncated
       author {
         id
         username
@@ -22,24 +24,6 @@ const UPDATE_POST = gql`
   }
 `;
 
-// Re-using the query from PostList to refetch after mutation
-const GET_ALL_POSTS = gql`
-  query GetAllPosts {
-    allPosts {
-      id
-      title
-      content
-      author {
-        id
-        username
-      }
-      createdAt
-      updatedAt
-      isAuthor
-    }
-  }
-`;
-
 interface EditPostFormProps {
   post: PostItemProps;
   onCancel: () => void;
@@ -47,17 +31,24 @@ interface EditPostFormProps {
 
 const EditPostForm: React.FC<EditPostFormProps> = ({ post, onCancel }) => {
   const [title, setTitle] = useState(post.title);
-  const [content, setContent] = useState(post.content);
+  const [content, setContent] = useState<string | null>(null);
   const { user } = useAuth();
+
+  // The feed only has the preview; load the full content to edit
+  const { data: contentData, loading: contentLoading } = useQuery(GET_POST_CONTENT, {
+    variables: { id: post.id },
+  });
+  useEffect(() => {
+    if (content === null && contentData?.post) {
+      setContent(contentData.post.content);
+    }
+  }, [content, contentData]);
   
   // Check if the current user is the author of the post
   const isAuthorized = user?.id === post.author.id;
 
+  // The returned post is merged into the cache by id, so the list updates without a refetch
   const [updatePost, { loading, error }] = useMutation(UPDATE_POST, {
-    refetchQueries: [
-      { query: GET_ALL_POSTS }
-    ],
-    awaitRefetchQueries: true,
     onCompleted: (data) => {
       console.log("Post update completed:", data);
       alert('Post updated successfully!');
@@ -70,7 +61,7 @@ const EditPostForm: React.FC<EditPostFormProps> = ({ post, onCancel }) => {
 
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
-    if (!title.trim() || !content.trim()) {
+    if (!title.trim() || !content?.trim()) {
       alert('Please fill in title and content.');
       return;
     }
@@ -150,8 +141,10 @@ const EditPostForm: React.FC<EditPostFormProps> = ({ post, onCancel }) => {
         <label htmlFor="content">Content: </label>
         <textarea
           id="content"
-          value={content}
+          value={content ?? ''}
           onChange={(e) => setContent(e.target.value)}
+          placeholder={contentLoading ? 'Loading...' : undefined}
+          disabled={content === null}
           required
           style={{ 
             marginBottom: '10px', 
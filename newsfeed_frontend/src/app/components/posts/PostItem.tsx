@@ -1,7 +1,7 @@
 'use client';
 
 import React from 'react';
-import { gql, useMutation } from '@apollo/client';
+import { gql, useLazyQuery, useMutation } from '@apollo/client';
 import { useAuth } from '../../context/AuthContext';
 import CommentList from './CommentList';
 import CommentForm from './CommentForm';
@@ -14,7 +14,8 @@ interface PostAuthor {
 export interface PostItemProps {
   id: string;
   title: string;
-  content: string;
+  contentPreview: string; // Stored excerpt of the content, all the feed loads
+  contentTruncated?: boolean; // Whether the preview is shorter than the content
   author: PostAuthor;
   createdAt: string; // Assuming ISO string format
   updatedAt: string; // Assuming ISO string format
@@ -26,6 +27,16 @@ export interface PostItemProps {
   onDelete: (id: string) => void; // Added for deleting
 }
 
+// Full content is only fetched for a single post, when the reader asks for it
+export const GET_POST_CONTENT = gql`
+  query GetPostContent($id: ID!) {
+    post(id: $id) {
+      id
+      content
+    }
+  }
+`;
+
 // Define GraphQL mutations for likes
 const LIKE_POST = gql`
   mutation LikePost($postId: ID!) {
@@ -50,7 +61,8 @@ const UNLIKE_POST = gql`
 const PostItem: React.FC<PostItemProps> = ({
   id,
   title,
-  content,
+  contentPreview,
+  contentTruncated = false,
   author,
   createdAt,
   isAuthor = false, // Default to false if not provided
@@ -62,6 +74,11 @@ const PostItem: React.FC<PostItemProps> = ({
 }) => {
   const { isAuthenticated } = useAuth();
   const [showComments, setShowComments] = React.useState(false);
+  const [expanded, setExpanded] = React.useState(false);
+  const [loadContent, { data: contentData, loading: contentLoading }] = useLazyQuery(GET_POST_CONTENT, {
+    variables: { id },
+  });
+  const fullContent: string | undefined = contentData?.post?.content;
 
   // Track likes and comments state locally with refs to avoid unnecessary re-renders
   const [likeStatus, setLikeStatus] = React.useState({
@@ -252,6 +269,13 @@ const PostItem: React.FC<PostItemProps> = ({
     }
   };
   
+  const handleReadMoreClick = () => {
+    if (!expanded && fullContent === undefined) {
+      loadContent();
+    }
+    setExpanded(!expanded);
+  };
+
   const handleCommentClick = () => {
     setShowComments(!showComments);
   };
@@ -279,8 +303,27 @@ const PostItem: React.FC<PostItemProps> = ({
       <p style={{ 
         fontSize: '16px',
         lineHeight: '1.6',
-        color: 'var(--secondary-text)'
-      }}>{content}</p>
+        color: 'var(--secondary-text)',
+        whiteSpace: expanded && fullContent !== undefined ? 'pre-wrap' : 'normal'
+      }}>{expanded && fullContent !== undefined ? fullContent : contentPreview}</p>
+
+      {contentTruncated && (
+        <button
+          onClick={handleReadMoreClick}
+          disabled={contentLoading}
+          style={{
+            padding: '0',
+            backgroundColor: 'transparent',
+            color: 'var(--primary)',
+            border: 'none',
+            cursor: 'pointer',
+            fontSize: '14px',
+            fontWeight: 'bold'
+          }}
+        >
+          {contentLoading ? 'Loading...' : expanded ? 'Show less' : 'Read more'}
+        </button>
+      )}
       
       <div style={{ 
         display: 'flex', 
@@ -1,7 +1,7 @@
 'use client';
 
-import React, { useState } from 'react';
-import { gql, useQuery, useMutation } from '@apollo/client';
+import React, { useEffect, useState } from 'react';
+import { gql, useQuery, useMutation, useSubscription } from '@apollo/client';
 import PostItem, { PostItemProps } from './PostItem';
 import EditPostForm from './EditPostForm';
 import { useTheme } from '../../context/ThemeContext';
@@ -12,7 +12,8 @@ const GET_ALL_POSTS = gql`
     allPosts {
       id
       title
-      content
+      contentPreview
+      contentTruncated
       author {
         id
         username
@@ -28,6 +29,59 @@ const GET_ALL_POSTS = gql`
   }
 `;
 
+// Fields every post in the list needs, shared by the query and the live updates
+const POST_LIST_FIELDS = gql`
+  fragment PostListFields on Post {
+    id
+    title
+    contentPreview
+    contentTruncated
+    author {
+      id
+      username
+    }
+    createdAt
+    updatedAt
+    isAuthor
+    likesCount
+    commentsCount
+    isLiked
+    __typename
+  }
+`;
+
+// Live updates pushed by the server instead of refetching the whole list.
+// Updated posts are merged into the normalized cache by id automatically.
+const POST_CREATED_SUBSCRIPTION = gql`
+  subscription OnPostCreated {
+    postCreated {
+      ...PostListFields
+    }
+  }
+  ${POST_LIST_FIELDS}
+`;
+
+const POST_UPDATED_SUBSCRIPTION = gql`
+  subscription OnPostUpdated {
+    postUpdated {
+      id
+      title
+      contentPreview
+      contentTruncated
+      updatedAt
+    }
+  }
+`;
+
+const POST_LIKE_COUNT_SUBSCRIPTION = gql`
+  subscription OnPostLikeCountChanged {
+    postLikeCountChanged {
+      id
+      likesCount
+    }
+  }
+`;
+
 // Define the GraphQL mutation for deleting posts
 const DELETE_POST_MUTATION = gql`
   mutation DeletePost($id: ID!) {
@@ -45,7 +99,7 @@ const PostList: React.FC = () => {
   const [postToEdit, setPostToEdit] = useState<PostItemProps | null>(null);
   const { darkMode } = useTheme();
 
-  const { loading, error, data } = useQuery<AllPostsData>(GET_ALL_POSTS, {
+  const { loading, error, data, subscribeToMore } = useQuery<AllPostsData>(GET_ALL_POSTS, {
     fetchPolicy: 'network-only', // Always fetch from network, bypass cache
     onCompleted: (data) => {
       console.log("PostList query completed, received data:", data);
@@ -55,9 +109,29 @@ const PostList: React.FC = () => {
     }
   });
 
+  // Prepend posts created by anyone (including us) as they are announced
+  useEffect(() => {
+    return subscribeToMore<{ postCreated: PostItemProps }>({
+      document: POST_CREATED_SUBSCRIPTION,
+      updateQuery: (previous, { subscriptionData }) => {
+        const post = subscriptionData.data?.postCreated;
+        if (!post || previous.allPosts.some(p => p.id === post.id)) {
+          return previous;
+        }
+        return { ...previous, allPosts: [post, ...previous.allPosts] };
+      },
+    });
+  }, [subscribeToMore]);
+
+  useSubscription(POST_UPDATED_SUBSCRIPTION);
+  useSubscription(POST_LIKE_COUNT_SUBSCRIPTION);
+
   const [deletePostMutation] = useMutation(DELETE_POST_MUTATION, {
-    refetchQueries: [{ query: GET_ALL_POSTS }],
-    awaitRefetchQueries: true
+    // Drop the post from the cache instead of refetching every post
+    update: (cache, _result, { variables }) => {
+      cache.evict({ id: cache.identify({ __typename: 'Post', id: variables?.id }) });
+      cache.gc();
+    }
   });
 
   if (loading) return (
@@ -1,5 +1,9 @@
-import { ApolloClient, InMemoryCache, HttpLink, from, ApolloLink, Observable } from "@apollo/client";
+import { ApolloClient, InMemoryCache, HttpLink, from, split, ApolloLink, Observable } from "@apollo/client";
 import { onError } from "@apollo/client/link/error";
+import { createPersistedQueryLink } from "@apollo/client/link/persisted-queries";
+import { GraphQLWsLink } from "@apollo/client/link/subscriptions";
+import { getMainDefinition } from "@apollo/client/utilities";
+import { createClient } from "graphql-ws";
 import { getAuthToken, refreshAuthToken } from './authUtils';
 
 // Error handling link with token refresh capability
@@ -64,14 +68,54 @@ const authMiddleware = new ApolloLink((operation, forward) => {
   return forward(operation);
 });
 
+// Automatic persisted queries - send a hash of the query instead of the full document
+// (the server asks for the full text once, the first time it sees a hash).
+// Hashed queries go out as GET, so the browser revalidates unchanged results
+// with If-None-Match and the server answers 304 without running them.
+const sha256 = async (query: string) => {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(query));
+  return Array.from(new Uint8Array(digest))
+    .map(byte => byte.toString(16).padStart(2, '0'))
+    .join('');
+};
+
+const persistedQueriesLink = createPersistedQueryLink({ sha256, useGETForHashedQueries: true });
+
 // HTTP link to the GraphQL server
 const httpLink = new HttpLink({
   uri: "http://localhost:8000/graphql/", // Your Django GraphQL endpoint
   credentials: "same-origin", 
 });
 
+// WebSocket link for subscriptions (served by the ASGI app). Browsers can't set
+// headers on a WebSocket, so the token goes in the connection_init payload.
+// Only created in the browser; there is nothing to subscribe to during SSR.
+const wsLink = typeof window !== 'undefined'
+  ? new GraphQLWsLink(createClient({
+      url: "ws://localhost:8000/graphql/",
+      connectionParams: () => {
+        const token = getAuthToken();
+        return token ? { authorization: `JWT ${token}` } : {};
+      },
+    }))
+  : null;
+
+const httpChain = from([errorLink, authMiddleware, persistedQueriesLink, httpLink]);
+
+// Subscriptions go over the WebSocket, everything else over HTTP
+const link = wsLink
+  ? split(
+      ({ query }) => {
+        const definition = getMainDefinition(query);
+        return definition.kind === 'OperationDefinition' && definition.operation === 'subscription';
+      },
+      wsLink,
+      httpChain,
+    )
+  : httpChain;
+
 const client = new ApolloClient({
-  link: from([errorLink, authMiddleware, httpLink]),
+  link,
   cache: new InMemoryCache(),
   defaultOptions: {
     watchQuery: {
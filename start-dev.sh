@@ -10,10 +10,12 @@ cleanup() {
 # Set trap for SIGINT (Ctrl+C)
 trap cleanup INT
 
-# Start Django server
+# Start Django server. It is served over ASGI by uvicorn, since the frontend's
+# live updates are GraphQL subscriptions over a WebSocket, which runserver
+# (WSGI) can't serve.
 echo "Starting Django server..."
 cd newsfeed_backend
-poetry run python manage.py runserver &
+poetry run uvicorn asgi:application --reload --port 8000 &
 DJANGO_PID=$!
 cd ..
 